@@ -11,9 +11,12 @@ from engine.priority import Priority
 from misc.colours import *
 from misc import constants
 import datetime
-from api.api_client import api_init, running_in_container
+from api.api_client import api_init, running_in_container, DEFAULT_PAGE_SIZE
 from api.client_factory import ApiClientFactory
-from api.config import set_api_client
+from api.config import set_api_client, set_workers
+from api.cluster_snapshot import DEFAULT_MAX_WORKERS
+from engine.deep_scan import DEFAULT_DEEP_SCAN_WORKERS, DEFAULT_EXEC_TIMEOUT, DEFAULT_EXEC_RATE
+from engine.pod_analyzer import PRIVILEGED, SECRET_VOLUMES, SECRET_ENV
 
 json_filename = ""
 output_file = ""
@@ -263,14 +266,18 @@ def generic_print(header, objects, show_rules=False):
                 t.add_row([get_color_by_priority(o.priority) + o.priority.name + WHITE, o.kind, o.namespace, o.name, o.time.ctime() + " (" + str(get_delta_days_from_now(o.time)) + " days)"])
     print_table_aligned_left(t)
 
-def print_all_risky_containers(priority=None, namespace=None, read_token_from_container=False):
-    pods = engine.utils.get_risky_pods(namespace, read_token_from_container)
+def get_replicas_columns(replica_names):
+    return [len(replica_names), '\n'.join(replica_names)]
+
+def print_all_risky_containers(priority=None, namespace=None, read_token_from_container=False, pods_findings=None, collapse_replicas=False):
+    pods = engine.utils.get_risky_pods(namespace, read_token_from_container, pods_findings, collapse_replicas)
     global curr_header
     curr_header = "|Risky Containers|"
 
     print("+----------------+")
     print("|Risky Containers|")
-    t = PrettyTable(['Priority', 'PodName', 'Namespace', 'ContainerName', 'ServiceAccountNamespace', 'ServiceAccountName'])
+    replicas_headers = ['Replicas', 'Replica Pods'] if collapse_replicas else []
+    t = PrettyTable(['Priority', 'PodName', 'Namespace', 'ContainerName', 'ServiceAccountNamespace', 'ServiceAccountName'] + replicas_headers)
     for pod in pods:
         if priority:
             pod.containers = filter_objects_by_priority(priority, pod.containers)
@@ -279,7 +286,8 @@ def print_all_risky_containers(priority=None, namespace=None, read_token_from_co
             for service_account in container.service_accounts_name_set:
                 all_service_account += service_account.user_info.name + ", "
             all_service_account = all_service_account[:-2]
-            t.add_row([get_color_by_priority(container.priority)+container.priority.name+WHITE, pod.name, pod.namespace, container.name, container.service_account_namespace, all_service_account])
+            replicas_columns = get_replicas_columns(pod.replicas) if collapse_replicas else []
+            t.add_row([get_color_by_priority(container.priority)+container.priority.name+WHITE, pod.name, pod.namespace, container.name, container.service_account_namespace, all_service_account] + replicas_columns)
 
     print_table_aligned_left(t)
 
@@ -292,8 +300,8 @@ def get_rules_by_namespace(namespace=None):
             return role
     return None
 
-def print_all_risky_subjects(show_rules=False, priority=None, namespace=None):
-    subjects = engine.utils.get_all_risky_subjects()
+def print_all_risky_subjects(show_rules=False, priority=None, namespace=None, expand_groups=False):
+    subjects = engine.utils.get_all_risky_subjects(expand_groups=expand_groups)
     if priority:
         subjects = filter_objects_by_priority(priority, subjects)
     global curr_header
@@ -315,11 +323,46 @@ def print_all_risky_subjects(show_rules=False, priority=None, namespace=None):
 
     print_table_aligned_left(t)
 
+def print_all_pods_checks(priority=None, namespace=None, read_token_from_container=False, collapse_replicas=False):
+    # All the pod checks are computed in one pass over the pods, then printed one table after the other.
+    pods_findings = engine.utils.get_pods_findings(namespace, deep_analysis=read_token_from_container, collapse_replicas=collapse_replicas)
+    print_all_risky_containers(priority=priority, namespace=namespace, pods_findings=pods_findings, collapse_replicas=collapse_replicas)
+    print_privileged_containers(namespace=namespace, pods_findings=pods_findings, collapse_replicas=collapse_replicas)
+    print_pods_with_access_secret_via_volumes(namespace=namespace, pods_findings=pods_findings, collapse_replicas=collapse_replicas)
+    print_pods_with_access_secret_via_environment(namespace=namespace, pods_findings=pods_findings, collapse_replicas=collapse_replicas)
+
+def print_workloads(priority=None, namespace=None):
+    workloads_findings = engine.utils.get_workloads_findings(namespace)
+    global curr_header
+    curr_header = "|Risky Workloads Containers|"
+    print("+--------------------------+")
+    print("|Risky Workloads Containers|")
+    t = PrettyTable(['Priority', 'Kind', 'Name', 'Namespace', 'Replicas', 'ContainerName', 'ServiceAccountNamespace', 'ServiceAccountName'])
+    for workload, pod_findings in workloads_findings:
+        containers = pod_findings.risky_containers
+        if priority:
+            containers = filter_objects_by_priority(priority, containers)
+        for container in containers:
+            all_service_account = ', '.join(service_account.user_info.name for service_account in container.service_accounts_name_set)
+            t.add_row([get_color_by_priority(container.priority)+container.priority.name+WHITE, workload.kind, workload.metadata.name, workload.metadata.namespace,
+                       workload.replicas if workload.replicas is not None else '', container.name, container.service_account_namespace, all_service_account])
+    print_table_aligned_left(t)
+
+    curr_header = "|Privileged Workloads Containers|"
+    print("+-------------------------------+")
+    print("|Privileged Workloads Containers|")
+    t = PrettyTable(['Kind', 'Name', 'Namespace', 'Pod Spec', 'Container', 'Container info'])
+    for workload, pod_findings in workloads_findings:
+        for container in pod_findings.get_privileged_containers():
+            t.add_row([workload.kind, workload.metadata.name, workload.metadata.namespace, parse_pod_spec(pod_findings.pod.spec, container),
+                       container.name, parse_container_spec(container)])
+    print_table_aligned_left(t)
+
 def print_all(days=None, priority=None, read_token_from_container=False):
     print_all_risky_roles(days=days, priority=priority)
     print_all_risky_rolebindings(days=days, priority=priority)
     print_all_risky_subjects(priority=priority)
-    print_all_risky_containers(priority=priority, read_token_from_container=False)
+    print_all_pods_checks(priority=priority, read_token_from_container=read_token_from_container)
 
 def print_associated_rolebindings_to_role(role_name, namespace=None):
     associated_rolebindings = engine.utils.get_rolebindings_associated_to_role(role_name=role_name, namespace=namespace)
@@ -384,6 +427,51 @@ def dump_tokens_from_pods(pod_name=None, namespace=None, read_token_from_contain
     print_table_aligned_left(t)
 
 
+def read_subjects_file(filename):
+    # One subject per line: <kind>,<name>[,<namespace>]. Empty lines and lines starting with '#' are skipped.
+    subjects = []
+    with open(filename, 'r') as file:
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            fields = [field.strip() for field in line.split(',')]
+            if len(fields) < 2 or not fields[0] or not fields[1]:
+                print("Skipping line {0} of {1}, expected <kind>,<name>[,<namespace>]".format(line_number, filename))
+                continue
+            namespace = fields[2] if len(fields) > 2 and fields[2] else None
+            subjects.append((fields[1], fields[0], namespace))
+    return subjects
+
+def print_associated_to_subjects_file(filename, print_function):
+    for name, kind, namespace in read_subjects_file(filename):
+        if kind == constants.SERVICEACCOUNT_KIND and namespace is None:
+            print("Skipping ServiceAccount '{0}', no namespace specified".format(name))
+            continue
+        print_function(name, kind, namespace)
+
+def print_subject_permissions(name, kind, namespace=None):
+    permissions = engine.utils.get_subject_permissions(name, kind, namespace)
+    print("Effective permissions of Subject '{0}':".format(name))
+    t = PrettyTable(['Namespace', 'Verb', 'API Group', 'Resource', 'Resource Name'])
+    for permission in permissions:
+        t.add_row([permission.namespace, permission.verb, permission.api_group, permission.resource, permission.resource_name])
+
+    print_table_aligned_left(t)
+
+def print_subjects_who_can(verb, resource, namespace=None):
+    permissions = engine.utils.get_subjects_who_can(verb, resource, namespace)
+    if namespace is None:
+        print("Subjects who can '{0}' '{1}':".format(verb, resource))
+    else:
+        print("Subjects who can '{0}' '{1}' in namespace '{2}':".format(verb, resource, namespace))
+    t = PrettyTable(['Kind', 'Subject Namespace', 'Name', 'Namespace', 'Verb', 'API Group', 'Resource', 'Resource Name'])
+    for permission in permissions:
+        t.add_row([permission.subject_kind, permission.subject_namespace, permission.subject_name, permission.namespace,
+                   permission.verb, permission.api_group, permission.resource, permission.resource_name])
+
+    print_table_aligned_left(t)
+
 def print_subjects_by_kind(kind):
     subjects = engine.utils.get_subjects_by_kind(kind)
     print('Subjects (kind: {0}) from all rolebindings:'.format(kind))
@@ -418,6 +506,8 @@ def get_pretty_rules(rules):
 
 def print_rolebinding_rules(rolebinding_name, namespace):
     role = engine.utils.get_rolebinding_role(rolebinding_name, namespace)
+    if role is None:
+        return
     print("RoleBinding '{0}\{1}' rules:".format(namespace, rolebinding_name))
     t = PrettyTable(['Kind', 'Namespace', 'Name', 'Rules'])
     t.add_row([role.kind, role.metadata.namespace, role.metadata.name, get_pretty_rules(role.rules)])
@@ -426,6 +516,8 @@ def print_rolebinding_rules(rolebinding_name, namespace):
 
 def print_clusterrolebinding_rules(cluster_rolebinding_name):
     cluster_role = engine.utils.get_clusterrolebinding_role(cluster_rolebinding_name)
+    if cluster_role is None:
+        return
     print("ClusterRoleBinding '{0}' rules:".format(cluster_rolebinding_name))
     t = PrettyTable(['Kind', 'Namespace', 'Name', 'Rules'])
     t.add_row([cluster_role.kind, cluster_role.metadata.namespace, cluster_role.metadata.name, get_pretty_rules(cluster_role.rules)])
@@ -442,44 +534,47 @@ def print_rules_associated_to_subject(name, kind, namespace=None):
     print_table_aligned_left(t)
 
 # https://kubernetes.io/docs/tasks/inject-data-application/distribute-credentials-secure/#create-a-pod-that-has-access-to-the-secret-data-through-a-volume
-def print_pods_with_access_secret_via_volumes(namespace=None):
-    pods = engine.utils.list_pods_for_all_namespaces_or_one_namspace(namespace)
+def print_pods_with_access_secret_via_volumes(namespace=None, pods_findings=None, collapse_replicas=False):
+    if pods_findings is None:
+        pods_findings = engine.utils.get_pods_findings(namespace, [SECRET_VOLUMES], collapse_replicas=collapse_replicas)
 
     print("Pods with access to secret data through volumes:")
-    t = PrettyTable(['Pod Name', 'Namespace', 'Container Name', 'Volume Mounted Secrets'])
-    for pod in pods.items:
-        for container in pod.spec.containers:
+    replicas_headers = ['Replicas', 'Replica Pods'] if collapse_replicas else []
+    t = PrettyTable(['Pod Name', 'Namespace', 'Container Name', 'Volume Mounted Secrets'] + replicas_headers)
+    for pod_findings in pods_findings:
+        pod = pod_findings.pod
+        for container_findings in pod_findings.containers:
             mount_info = ''
             secrets_num = 1
-            if container.volume_mounts is not None:
-                for volume_mount in container.volume_mounts:
-                    for volume in pod.spec.volumes:
-                        if volume.secret is not None and volume.name == volume_mount.name:
-                            #mount_info += 'Mounted path: {0}\nSecret name: {1}\nVolume name: {2}\n'.format(volume_mount.mount_path, volume.secret.secret_name, volume.name)
-                            mount_info += '{2}. Mounted path: {0}\n   Secret name: {1}\n'.format(volume_mount.mount_path, volume.secret.secret_name, secrets_num)
-                            secrets_num += 1
-                if mount_info != '':
-                    t.add_row([pod.metadata.name, pod.metadata.namespace, container.name, mount_info])
+            for volume_mount, volume in container_findings.secret_volume_mounts:
+                #mount_info += 'Mounted path: {0}\nSecret name: {1}\nVolume name: {2}\n'.format(volume_mount.mount_path, volume.secret.secret_name, volume.name)
+                mount_info += '{2}. Mounted path: {0}\n   Secret name: {1}\n'.format(volume_mount.mount_path, volume.secret.secret_name, secrets_num)
+                secrets_num += 1
+            if mount_info != '':
+                replicas_columns = get_replicas_columns([replica.metadata.name for replica in pod_findings.replicas]) if collapse_replicas else []
+                t.add_row([pod.metadata.name, pod.metadata.namespace, container_findings.container.name, mount_info] + replicas_columns)
 
     print_table_aligned_left(t)
 
 # https://kubernetes.io/docs/tasks/inject-data-application/distribute-credentials-secure/#create-a-pod-that-has-access-to-the-secret-data-through-environment-variables
-def print_pods_with_access_secret_via_environment(namespace=None):
-    pods = engine.utils.list_pods_for_all_namespaces_or_one_namspace(namespace)
+def print_pods_with_access_secret_via_environment(namespace=None, pods_findings=None, collapse_replicas=False):
+    if pods_findings is None:
+        pods_findings = engine.utils.get_pods_findings(namespace, [SECRET_ENV], collapse_replicas=collapse_replicas)
 
     print("Pods with access to secret data through environment:")
-    t = PrettyTable(['Pod Name', 'Namespace', 'Container Name', 'Environment Mounted Secrets'])
-    for pod in pods.items:
-        for container in pod.spec.containers:
+    replicas_headers = ['Replicas', 'Replica Pods'] if collapse_replicas else []
+    t = PrettyTable(['Pod Name', 'Namespace', 'Container Name', 'Environment Mounted Secrets'] + replicas_headers)
+    for pod_findings in pods_findings:
+        pod = pod_findings.pod
+        for container_findings in pod_findings.containers:
             mount_info = ''
             secrets_num = 1
-            if container.env is not None:
-                for env in container.env:
-                    if env.value_from is not None and env.value_from.secret_key_ref is not None:
-                        mount_info += '{2}. Environment variable name: {0}\n   Secret name: {1}\n'.format(env.name, env.value_from.secret_key_ref.name, secrets_num)
-                        secrets_num += 1
-                if mount_info != '':
-                    t.add_row([pod.metadata.name, pod.metadata.namespace, container.name, mount_info])
+            for env in container_findings.secret_env:
+                mount_info += '{2}. Environment variable name: {0}\n   Secret name: {1}\n'.format(env.name, env.value_from.secret_key_ref.name, secrets_num)
+                secrets_num += 1
+            if mount_info != '':
+                replicas_columns = get_replicas_columns([replica.metadata.name for replica in pod_findings.replicas]) if collapse_replicas else []
+                t.add_row([pod.metadata.name, pod.metadata.namespace, container_findings.container.name, mount_info] + replicas_columns)
 
     print_table_aligned_left(t)
 
@@ -541,16 +636,20 @@ def parse_pod_spec(pod_spec, container):
     spec += parse_security_context(pod_spec.security_context)
     return spec
 
-def print_privileged_containers(namespace=None):
+def print_privileged_containers(namespace=None, pods_findings=None, collapse_replicas=False):
     global curr_header
     curr_header = "|Privileged Containers|"
     print("+---------------------+")
     print("|Privileged Containers|")
-    t = PrettyTable(['Pod', 'Namespace', 'Pod Spec', 'Container', 'Container info'])
-    pods = engine.privleged_containers.get_privileged_containers(namespace)
-    for pod in pods:
-        for container in pod.spec.containers:
-            t.add_row([pod.metadata.name, pod.metadata.namespace, parse_pod_spec(pod.spec, container), container.name, parse_container_spec(container)])
+    replicas_headers = ['Replicas', 'Replica Pods'] if collapse_replicas else []
+    t = PrettyTable(['Pod', 'Namespace', 'Pod Spec', 'Container', 'Container info'] + replicas_headers)
+    if pods_findings is None:
+        pods_findings = engine.utils.get_pods_findings(namespace, [PRIVILEGED], collapse_replicas=collapse_replicas)
+    for pod_findings in pods_findings:
+        pod = pod_findings.pod
+        replicas_columns = get_replicas_columns([replica.metadata.name for replica in pod_findings.replicas]) if collapse_replicas else []
+        for container in pod_findings.get_privileged_containers():
+            t.add_row([pod.metadata.name, pod.metadata.namespace, parse_pod_spec(pod.spec, container), container.name, parse_container_spec(container)] + replicas_columns)
 
     print_table_aligned_left(t)
 
@@ -648,7 +747,16 @@ Requirements:
                                                                       'Use the -d\--deep switch to read the tokens from the current running containers', required=False)
     opt.add_argument('-d', '--deep', action='store_true', help='Works only with -rp\--risky-pods switch. If this is specified, it will execute each pod to get its token.\n'
                                                                'Without it, it will read the pod mounted service account secret from the ETCD, it less reliable but much faster.', required=False)
+    opt.add_argument('--deep-workers', type=int, default=DEFAULT_DEEP_SCAN_WORKERS, metavar='NUMBER', help='Number of containers read concurrently by the -d\--deep switch.', required=False)
+    opt.add_argument('--exec-timeout', type=float, default=DEFAULT_EXEC_TIMEOUT, metavar='SECONDS', help='Timeout for each exec into a container.', required=False)
+    opt.add_argument('--exec-rate', type=float, default=DEFAULT_EXEC_RATE, metavar='NUMBER', help='Maximum number of execs started per second, shared by all the deep scan workers. Use 0 for no limit.', required=False)
+    opt.add_argument('--deep-all-containers', action='store_true', help='With -d\--deep, execute into every running container. By default a single container is executed for each group of containers\n'
+                                                                          'with the same namespace, service account and token mount.', required=False)
     opt.add_argument('-pp', '--privleged-pods', action='store_true', help='Get all privileged Pods\Containers.',  required=False)
+    opt.add_argument('-apc', '--all-pods-checks', action='store_true', help='Get the risky containers, privileged containers and pods with access to secret data\n'
+                                                                            '(volumes and environment) in a single pass over the pods. Supports -d\--deep.', required=False)
+    opt.add_argument('-wl', '--workloads', action='store_true', help='Get the risky and privileged containers of the workloads pod templates (Deployments, ReplicaSets, StatefulSets,\n'
+                                                                     'DaemonSets, Jobs, CronJobs, ReplicationControllers), including the workloads without running pods.', required=False)
     opt.add_argument('-a', '--all', action='store_true',help='Get all risky Roles\ClusterRoles, RoleBindings\ClusterRoleBindings, users and pods\containers', required=False)
     opt.add_argument('-cve', '--cve', action='store_true', help=f"Scan of CVE's", required=False)
     opt.add_argument('-jt', '--join-token', action='store_true', help='Get join token for the cluster. OpenSsl must be installed + kubeadm', required=False)
@@ -656,15 +764,24 @@ Requirements:
     opt.add_argument('-pse', '--pods-secrets-env', action='store_true', help='Show all pods with access to secret data throught a environment variables', required=False)
     opt.add_argument('-ctx', '--context', action='store', help='Context to run. If none, it will run in the current context.', required=False)
     opt.add_argument('-p', '--priority', action='store', help='Filter by priority (CRITICAL\HIGH\LOW)', required=False)
+    opt.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, metavar='NUMBER', help='Number of objects requested per LIST call (limit\continue). Use 0 to list each collection in a single call.', required=False)
+    opt.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS, metavar='NUMBER', help='Number of API requests sent concurrently when fetching independent collections. Use 1 to fetch them one after another.', required=False)
+    opt.add_argument('--request-timeout', type=float, metavar='SECONDS', help='Timeout for each API request.', required=False)
+    opt.add_argument('--risk-cache', metavar='CACHE_FILENAME', help='File used to keep the risk classification of the roles rules between runs. Roles with the same rules are classified once.', required=False)
+    opt.add_argument('--raw-json', action='store_true', help='Read the API responses as raw JSON into lightweight records instead of kubernetes models. Faster on large clusters, same findings.', required=False)
 
 
     helper_switches = opt.add_argument_group('Helper switches')
     helper_switches.add_argument('-lt', '--less-than', action='store', metavar='NUMBER', help='Used to filter object exist less than X days.\nSupported on Roles\ClusterRoles and RoleBindings\ClusterRoleBindings.'
                                                                                               'IMPORTANT: If object does not have creation time (usually in ClusterRoleBindings), omit this switch to see it.', required=False)
 
+    helper_switches.add_argument('-cr', '--collapse-replicas', action='store_true', help='Analyze one pod for each group of replicas (same controller and pod template hash, or same Job) and report the number and names of the replicas.\n'
+                                                                                    'Supported on -rp, -pp, -psv, -pse and -apc.', required=False)
     helper_switches.add_argument('-ns', '--namespace', action='store', help='If present, the namespace scope that will be used', required=False)
     helper_switches.add_argument('-k', '--kind', action='store', help='Kind of the object', required=False)
     helper_switches.add_argument('-r', '--rules', action='store_true', help='Show rules. Supported only on pinrting risky Roles\ClusterRoles.', required=False)
+    helper_switches.add_argument('-eg', '--expand-groups', action='store_true', help='Used with -rs\--risky-subjects. Also show the service accounts that get risky permissions through the built-in groups\n'
+                                                                                  '(system:serviceaccounts, system:serviceaccounts:<namespace>, system:authenticated).', required=False)
     helper_switches.add_argument('-e', '--examples', action='store_true', help='Show examples.', required=False)
     helper_switches.add_argument('-n', '--name', action='store', help='Name', required=False)
     dumping_tokens = opt.add_argument_group('Dumping tokens', description='Use the switches: name (-n\--name) or namespace (-ns\ --namespace)')
@@ -722,6 +839,24 @@ Requirements:
                                               help='Get associated Roles\ClusterRoles to a specific Subject (user, group or service account)\n'
                                                    'Example: -aars \"generic-garbage-collector\" -k \"ServiceAccount\" -ns \"kube-system\"', required=False)
 
+    associated_to_subjects_file = opt.add_argument_group('Associated RoleBindings\ClusterRoleBindings or Roles\ClusterRoles to Subjects from a file',
+                                                         description='The file has a subject per line: <kind>,<name>[,<namespace>].\n')
+    associated_to_subjects_file.add_argument('-aarbsf', '--associated-any-rolebindings-subjects-file', action='store', metavar='SUBJECTS_FILENAME',
+                                             help='Get associated Rolebindings\ClusterRoleBindings to each Subject in the file\n'
+                                                  'Example: -aarbsf subjects.txt', required=False)
+    associated_to_subjects_file.add_argument('-aarsf', '--associated-any-roles-subjects-file', action='store', metavar='SUBJECTS_FILENAME',
+                                             help='Get associated Roles\ClusterRoles to each Subject in the file\n'
+                                                  'Example: -aarsf subjects.txt', required=False)
+
+    effective_permissions = opt.add_argument_group('Effective permissions',
+                                                   description='Permissions granted by all the RoleBindings\ClusterRoleBindings. "*" in the Namespace column means all namespaces (ClusterRoleBinding).\n')
+    effective_permissions.add_argument('-ep', '--effective-permissions', action='store', metavar='SUBJECT_NAME',
+                                       help='Get the effective permissions of a Subject (user, group or service account). Use the switches: namespace (-ns\--namespace) and kind (-k\--kind).\n'
+                                            'Example: -ep "generic-garbage-collector" -k "ServiceAccount" -ns "kube-system"', required=False)
+    effective_permissions.add_argument('-wc', '--who-can', action='store', nargs=2, metavar=('VERB', 'RESOURCE'),
+                                       help='Get the Subjects that can use a verb on a resource, optionally in a namespace (-ns\--namespace)\n'
+                                            'Example: -wc get secrets -ns "kube-system"', required=False)
+
     list_subjects = opt.add_argument_group('List Subjects')
     list_subjects.add_argument('-su', '--subject-users', action='store_true', help='Get Subjects with User kind', required=False)
     list_subjects.add_argument('-sg', '--subject-groups', action='store_true', help='Get Subjects with Group kind', required=False)
@@ -754,10 +889,16 @@ Requirements:
     if args.file:
         api_client = ApiClientFactory.get_client(use_static=True, input_file=args.file)
     else:
-        api_client = ApiClientFactory.get_client(use_static=False)
+        api_client = ApiClientFactory.get_client(use_static=False, page_size=args.page_size, request_timeout=args.request_timeout,
+                                                 raw_json=args.raw_json)
         api_init(kube_config_file=args.kube_config, host=args.host, token_filename=args.token_filename, cert_filename=args.cert_filename, context=args.context)
     
     set_api_client(api_client)
+    set_workers(args.workers)
+    engine.utils.set_deep_scan_options(args.deep_workers, args.exec_timeout, args.exec_rate,
+                                       all_containers=args.deep_all_containers)
+    if args.risk_cache:
+        engine.utils.load_role_risk_cache(args.risk_cache)
 
 
     if args.cve:
@@ -775,28 +916,40 @@ Requirements:
     if args.risky_any_rolebindings:
         print_all_risky_rolebindings(days=args.less_than, priority=args.priority, namespace=args.namespace)
     if args.risky_subjects:
-        print_all_risky_subjects(show_rules=args.rules,priority=args.priority, namespace=args.namespace)
+        print_all_risky_subjects(show_rules=args.rules,priority=args.priority, namespace=args.namespace, expand_groups=args.expand_groups)
     if args.risky_pods:
         if args.deep and args.file:
             print('Cannot access pods token in a static scan. In static scan use -rp only.')
         else:
-            print_all_risky_containers(priority=args.priority, namespace=args.namespace, read_token_from_container=args.deep)
+            print_all_risky_containers(priority=args.priority, namespace=args.namespace, read_token_from_container=args.deep,
+                                       collapse_replicas=args.collapse_replicas)
     if args.all:
-        print_all(days=args.less_than, priority=args.priority, read_token_from_container=args.deep)
+        if args.deep and args.file:
+            print('Cannot access pods token in a static scan. In static scan use -a only.')
+        else:
+            print_all(days=args.less_than, priority=args.priority, read_token_from_container=args.deep)
+    elif args.all_pods_checks:
+        if args.deep and args.file:
+            print('Cannot access pods token in a static scan. In static scan use -apc only.')
+        else:
+            print_all_pods_checks(priority=args.priority, namespace=args.namespace, read_token_from_container=args.deep,
+                                  collapse_replicas=args.collapse_replicas)
+    elif args.workloads:
+        print_workloads(priority=args.priority, namespace=args.namespace)
     elif args.privleged_pods:
-        print_privileged_containers(namespace=args.namespace)
+        print_privileged_containers(namespace=args.namespace, collapse_replicas=args.collapse_replicas)
     elif args.join_token:
         print_join_token()
     elif args.pods_secrets_volume:
         if args.namespace:
-            print_pods_with_access_secret_via_volumes(namespace=args.namespace)
+            print_pods_with_access_secret_via_volumes(namespace=args.namespace, collapse_replicas=args.collapse_replicas)
         else:
-            print_pods_with_access_secret_via_volumes()
+            print_pods_with_access_secret_via_volumes(collapse_replicas=args.collapse_replicas)
     elif args.pods_secrets_env:
         if args.namespace:
-            print_pods_with_access_secret_via_environment(namespace=args.namespace)
+            print_pods_with_access_secret_via_environment(namespace=args.namespace, collapse_replicas=args.collapse_replicas)
         else:
-            print_pods_with_access_secret_via_environment()
+            print_pods_with_access_secret_via_environment(collapse_replicas=args.collapse_replicas)
     elif args.associated_any_rolebindings_role:
         if args.namespace:
             print_associated_rolebindings_to_role(args.associated_any_rolebindings_role, args.namespace)
@@ -824,6 +977,24 @@ Requirements:
                 print_rules_associated_to_subject(args.associated_any_roles_subject, args.kind)
         else:
             print("Please specify kind (-k, --kind).")
+    elif args.associated_any_rolebindings_subjects_file:
+        print_associated_to_subjects_file(args.associated_any_rolebindings_subjects_file,
+                                          print_associated_rolebindings_and_clusterrolebindings_to_subject)
+    elif args.associated_any_roles_subjects_file:
+        print_associated_to_subjects_file(args.associated_any_roles_subjects_file, print_rules_associated_to_subject)
+    elif args.effective_permissions:
+        if args.kind:
+            if args.kind.lower() == constants.SERVICEACCOUNT_KIND.lower():
+                if args.namespace:
+                    print_subject_permissions(args.effective_permissions, args.kind, args.namespace)
+                else:
+                    print('For ServiceAccount kind specify namespace (-ns, --namespace)')
+            else:
+                print_subject_permissions(args.effective_permissions, args.kind)
+        else:
+            print("Please specify kind (-k, --kind).")
+    elif args.who_can:
+        print_subjects_who_can(args.who_can[0], args.who_can[1], args.namespace)
     elif args.dump_tokens:
         if args.name:
             if args.namespace:
@@ -848,6 +1019,9 @@ Requirements:
     elif args.clusterrolebinding_rules:
         print_clusterrolebinding_rules(args.clusterrolebinding_rules)
 
+    if args.risk_cache:
+        engine.utils.save_role_risk_cache(args.risk_cache)
+
 def print_table_aligned_left(table):
     global json_filename
     if json_filename != "":
@@ -1,15 +1,19 @@
 from kubernetes import client, config
 from shutil import copyfile
+import json
 import os
 from tempfile import mkstemp
 from shutil import move
 from kubernetes.client.configuration import Configuration
 from kubernetes.client.api_client import ApiClient
-from .base_client_api import BaseApiClient
+from kubernetes.client.rest import ApiException
+from .base_client_api import BaseApiClient, SERVICE_ACCOUNT_TOKEN_SECRET_TYPE
+from .records import RoleRecord, RoleBindingRecord, PodRecord, ServiceAccountRecord, SecretRecord, WorkloadRecord
 
 # TODO: Should be removed after the bug will be solved:
 # https://github.com/kubernetes-client/python/issues/577
 from .api_client_temp import ApiClientTemp
+from .paging import iter_paged_items
 
 # The following variables have been commented as it resulted a bug when running `kubiscan -h`
 # Exception ignored in: <bound method ApiClient.__del__ of <kubernetes.client.api_client.ApiClient object ...
@@ -24,6 +28,20 @@ RbacAuthorizationV1Api = None
 configuration = None
 api_version = None
 
+# Number of items requested per LIST call, '0' lists each collection in a single response.
+DEFAULT_PAGE_SIZE = 500
+
+# Collection paths of the WORKLOAD_KINDS, the next paths of a kind are tried when the API server doesn't serve the first.
+WORKLOAD_PATHS = [
+    ('Deployment', ['/apis/apps/v1/deployments']),
+    ('ReplicaSet', ['/apis/apps/v1/replicasets']),
+    ('StatefulSet', ['/apis/apps/v1/statefulsets']),
+    ('DaemonSet', ['/apis/apps/v1/daemonsets']),
+    ('Job', ['/apis/batch/v1/jobs']),
+    ('CronJob', ['/apis/batch/v1/cronjobs', '/apis/batch/v1beta1/cronjobs']),
+    ('ReplicationController', ['/api/v1/replicationcontrollers']),
+]
+
 def running_in_container():
     running_in_a_container = os.getenv('RUNNING_IN_A_CONTAINER')
     if running_in_a_container is not None and running_in_a_container == 'true':
@@ -144,9 +162,56 @@ class BearerTokenLoader(object):
         return configuration
 
 
+def list_in_pages(list_function, page_size, *args, **kwargs):
+    """
+    Yields the items of a kubernetes client list function page by page, using 'limit'
+    and the 'continue' token from the list metadata (see paging.iter_paged_items()).
+    """
+    if not page_size:
+        yield from list_function(*args, **kwargs).items
+        return
+
+    def list_page(limit, _continue):
+        page_kwargs = dict(kwargs)
+        if limit:
+            page_kwargs['limit'] = limit
+        if _continue:
+            page_kwargs['_continue'] = _continue
+        response = list_function(*args, **page_kwargs)
+        return response.items, response.metadata._continue
+
+    yield from iter_paged_items(list_page, page_size, lambda item: item.metadata.uid)
+
+def list_raw_in_pages(list_function, page_size, to_record, *args, **kwargs):
+    """
+    Same as list_in_pages(), but requests the responses with '_preload_content=False' and maps
+    each item of the JSON with 'to_record', skipping the kubernetes models deserialization.
+    """
+    def list_page(limit, _continue):
+        page_kwargs = dict(kwargs)
+        if limit:
+            page_kwargs['limit'] = limit
+        if _continue:
+            page_kwargs['_continue'] = _continue
+        page = json.loads(list_function(*args, _preload_content=False, **page_kwargs).data)
+        return page.get('items'), (page.get('metadata') or {}).get('continue')
+
+    for item in iter_paged_items(list_page, page_size, lambda item: (item.get('metadata') or {}).get('uid')):
+        yield to_record(item)
+
 class RegularApiClient(BaseApiClient):
-    def __init__(self):
+    def __init__(self, page_size=DEFAULT_PAGE_SIZE, request_timeout=None, raw_json=False):
         config.load_kube_config()
+        self.page_size = page_size
+        # Passed as '_request_timeout' to every paged LIST request, in seconds.
+        self.request_timeout = request_timeout
+        self.raw_json = raw_json
+
+    def _iter_collection(self, list_function, to_record, *args, **kwargs):
+        if self.raw_json:
+            return list_raw_in_pages(list_function, self.page_size, to_record, *args,
+                                     _request_timeout=self.request_timeout, **kwargs)
+        return list_in_pages(list_function, self.page_size, *args, _request_timeout=self.request_timeout, **kwargs)
 
     def list_roles_for_all_namespaces(self):
         return RbacAuthorizationV1Api.list_role_for_all_namespaces()
@@ -173,4 +238,59 @@ class RegularApiClient(BaseApiClient):
         return CoreV1Api.list_pod_for_all_namespaces(watch=watch)
     
     def list_namespaced_pod(self, namespace):
-        return CoreV1Api.list_namespaced_pod(namespace)
\ No newline at end of file
+        return CoreV1Api.list_namespaced_pod(namespace)
+
+    def list_service_account_for_all_namespaces(self):
+        return CoreV1Api.list_service_account_for_all_namespaces()
+
+    def list_secret_for_all_namespaces(self):
+        return CoreV1Api.list_secret_for_all_namespaces()
+
+    def iter_roles_for_all_namespaces(self):
+        return self._iter_collection(RbacAuthorizationV1Api.list_role_for_all_namespaces, RoleRecord)
+
+    def iter_cluster_role(self):
+        if self.raw_json:
+            return (RoleRecord(item, kind='ClusterRole')
+                    for item in api_temp.iter_cluster_role_json(limit=self.page_size, _request_timeout=self.request_timeout))
+        return api_temp.iter_cluster_role(limit=self.page_size, _request_timeout=self.request_timeout)
+
+    def iter_role_binding_for_all_namespaces(self):
+        return self._iter_collection(RbacAuthorizationV1Api.list_role_binding_for_all_namespaces, RoleBindingRecord)
+
+    def iter_cluster_role_binding(self):
+        if self.raw_json:
+            return (RoleBindingRecord(item)
+                    for item in api_temp.iter_cluster_role_binding_json(limit=self.page_size, _request_timeout=self.request_timeout))
+        return api_temp.iter_cluster_role_binding(limit=self.page_size, _request_timeout=self.request_timeout)
+
+    def iter_pod_for_all_namespaces(self):
+        return self._iter_collection(CoreV1Api.list_pod_for_all_namespaces, PodRecord)
+
+    def iter_namespaced_pod(self, namespace):
+        return self._iter_collection(CoreV1Api.list_namespaced_pod, PodRecord, namespace)
+
+    def iter_service_account_for_all_namespaces(self):
+        return self._iter_collection(CoreV1Api.list_service_account_for_all_namespaces, ServiceAccountRecord)
+
+    def iter_service_account_token_secrets(self, namespace=None):
+        field_selector = 'type=' + SERVICE_ACCOUNT_TOKEN_SECRET_TYPE
+        if namespace is None:
+            return self._iter_collection(CoreV1Api.list_secret_for_all_namespaces, SecretRecord, field_selector=field_selector)
+        return self._iter_collection(CoreV1Api.list_namespaced_secret, SecretRecord, namespace, field_selector=field_selector)
+
+    def iter_workloads(self):
+        # Read as raw JSON whatever 'raw_json' is, the kubernetes client of KubiScan has no batch/v1 CronJob model.
+        # A kind that can't be listed (not served, or forbidden by the RBAC of the scanning user) is skipped.
+        for kind, paths in WORKLOAD_PATHS:
+            for path in paths:
+                try:
+                    for item in api_temp.iter_collection_json(path, limit=self.page_size, _request_timeout=self.request_timeout):
+                        yield WorkloadRecord(item, kind=kind)
+                    break
+                except ApiException as e:
+                    if e.status == 403:
+                        print(f"Skipping the {kind} workloads, listing {path} is forbidden")
+                        break
+                    if e.status != 404:
+                        raise
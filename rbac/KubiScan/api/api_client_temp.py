@@ -32,6 +32,8 @@ from kubernetes.client import models, V1ObjectMeta, V1RoleRef, V1Subject, V1Clus
 from kubernetes.client.configuration import Configuration
 from kubernetes.client.rest import ApiException, RESTClientObject
 
+from .paging import iter_paged_items
+
 class ApiClientTemp(object):
     """
     Generic API client for Swagger client library builds.
@@ -634,16 +636,46 @@ class ApiClientTemp(object):
         return instance
 
 
-    def list_cluster_role_binding(self):
-        json_data =  self.__call_api(resource_path='/apis/rbac.authorization.k8s.io/v1/clusterrolebindings', method='GET',
-                   path_params={}, query_params=[],
-                   header_params={'Content-Type': 'application/json', 'Accept': 'application/json'},
-                   body=None, post_params=[], files={},
-                   response_type='V1ClusterRoleBindingList', auth_settings=['BearerToken'],
-                   _return_http_data_only=None, collection_formats={}, _preload_content=True,
-                   _request_timeout=None)
-        cluster_role_bindings = []
-        for i in json_data[0]['items']:
+    def __list(self, resource_path, response_type, limit=None, _continue=None, _request_timeout=None):
+        query_params = []
+        if limit:
+            query_params.append(('limit', limit))
+        if _continue:
+            query_params.append(('continue', _continue))
+        json_data = self.__call_api(resource_path, 'GET',
+                                    path_params={}, query_params=query_params,
+                                    header_params={'Content-Type': 'application/json', 'Accept': 'application/json'},
+                                    body=None, post_params=[], files={},
+                                    response_type=response_type, auth_settings=['BearerToken'],
+                                    _return_http_data_only=None, collection_formats={}, _preload_content=True,
+                                    _request_timeout=_request_timeout)
+        return json_data[0]
+
+    def __list_in_pages(self, resource_path, response_type, limit=None, _request_timeout=None):
+        """
+        Yields the raw items of a collection, requesting 'limit' items per page and following
+        the 'continue' token until the collection is exhausted. Without 'limit' a single request is made.
+        """
+        def list_page(page_limit, _continue):
+            page = self.__list(resource_path, response_type, limit=page_limit, _continue=_continue,
+                               _request_timeout=_request_timeout)
+            return page['items'], (page.get('metadata') or {}).get('continue')
+
+        return iter_paged_items(list_page, limit, lambda item: (item.get('metadata') or {}).get('uid'))
+
+    def iter_cluster_role_binding_json(self, limit=None, _request_timeout=None):
+        return self.__list_in_pages('/apis/rbac.authorization.k8s.io/v1/clusterrolebindings', 'V1ClusterRoleBindingList',
+                                    limit, _request_timeout)
+
+    def iter_collection_json(self, resource_path, limit=None, _request_timeout=None):
+        return self.__list_in_pages(resource_path, 'object', limit, _request_timeout)
+
+    def iter_cluster_role_json(self, limit=None, _request_timeout=None):
+        return self.__list_in_pages('/apis/rbac.authorization.k8s.io/v1/clusterroles', 'V1ClusterRoleList',
+                                    limit, _request_timeout)
+
+    def iter_cluster_role_binding(self, limit=None, _request_timeout=None):
+        for i in self.iter_cluster_role_binding_json(limit, _request_timeout):
 
              metadata = V1ObjectMeta(name=i['metadata']['name'], creation_timestamp=self._ApiClientTemp__deserialize_datatime(i['metadata']['creationTimestamp']))
              role_ref = V1RoleRef(api_group=i['roleRef']['apiGroup'], name=i['roleRef']['name'], kind=i['roleRef']['kind'])
@@ -657,20 +689,13 @@ class ApiClientTemp(object):
                        subjects.append(V1Subject(kind=s['kind'], name=s['name'], namespace=namespace))
 
              cluster_role_binding = V1ClusterRoleBinding(metadata=metadata, role_ref=role_ref, subjects=subjects)
-             cluster_role_bindings.append(cluster_role_binding)
+             yield cluster_role_binding
 
-        return cluster_role_bindings
+    def list_cluster_role_binding(self):
+        return list(self.iter_cluster_role_binding())
 
-    def list_cluster_role(self):
-        json_data = self.__call_api('/apis/rbac.authorization.k8s.io/v1/clusterroles', 'GET',
-                                        path_params={}, query_params=[],
-                                        header_params={'Content-Type': 'application/json', 'Accept': 'application/json'},
-                                        body=None, post_params=[], files={},
-                                        response_type='V1ClusterRoleList', auth_settings=['BearerToken'],
-                                        _return_http_data_only=None, collection_formats={}, _preload_content=True,
-                                        _request_timeout=None)
-        cluster_roles = []
-        for i in json_data[0]['items']:
+    def iter_cluster_role(self, limit=None, _request_timeout=None):
+        for i in self.iter_cluster_role_json(limit, _request_timeout):
             metadata = V1ObjectMeta(name=i['metadata']['name'],
                                     creation_timestamp=self._ApiClientTemp__deserialize_datatime(
                                         i['metadata']['creationTimestamp']))
@@ -688,6 +713,7 @@ class ApiClientTemp(object):
                     rules.append(V1PolicyRule(resources=resources, verbs=verbs))
 
             cluster_role = V1ClusterRole(kind='ClusterRole', metadata=metadata, rules=rules)
-            cluster_roles.append(cluster_role)
+            yield cluster_role
 
-        return V1ClusterRoleList(items=cluster_roles)
\ No newline at end of file
+    def list_cluster_role(self):
+        return V1ClusterRoleList(items=list(self.iter_cluster_role()))
@@ -1,7 +1,14 @@
 from abc import ABC, abstractmethod
 
+SERVICE_ACCOUNT_TOKEN_SECRET_TYPE = 'kubernetes.io/service-account-token'
+
+# Controllers with a pod template, read by the workloads scan.
+WORKLOAD_KINDS = ('Deployment', 'ReplicaSet', 'StatefulSet', 'DaemonSet', 'Job', 'CronJob', 'ReplicationController')
+
 
 class BaseApiClient(ABC):
+    # When True, the iter_* methods yield the lightweight records from api.records instead of V1* models.
+    raw_json = False
 
     @abstractmethod
     def list_roles_for_all_namespaces(self):
@@ -37,4 +44,49 @@ class BaseApiClient(ABC):
 
     @abstractmethod
     def list_namespaced_pod(self,namespace):
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def list_service_account_for_all_namespaces(self):
+        pass
+
+    @abstractmethod
+    def list_secret_for_all_namespaces(self):
+        pass
+
+    # The iter_* methods yield the items of a collection. Clients that can page through the
+    # API (limit/continue) override them so only one page is held in memory at a time.
+
+    def iter_roles_for_all_namespaces(self):
+        yield from self.list_roles_for_all_namespaces().items
+
+    def iter_cluster_role(self):
+        yield from self.list_cluster_role().items
+
+    def iter_role_binding_for_all_namespaces(self):
+        yield from self.list_role_binding_for_all_namespaces().items
+
+    def iter_cluster_role_binding(self):
+        yield from self.list_cluster_role_binding()
+
+    def iter_pod_for_all_namespaces(self):
+        yield from self.list_pod_for_all_namespaces(watch=False).items
+
+    def iter_namespaced_pod(self, namespace):
+        yield from self.list_namespaced_pod(namespace).items
+
+    def iter_service_account_for_all_namespaces(self):
+        yield from self.list_service_account_for_all_namespaces().items
+
+    def iter_secret_for_all_namespaces(self):
+        yield from self.list_secret_for_all_namespaces().items
+
+    def iter_service_account_token_secrets(self, namespace=None):
+        # Secrets of type kubernetes.io/service-account-token, of all namespaces if 'namespace' is None.
+        for secret in self.iter_secret_for_all_namespaces():
+            if secret.type == SERVICE_ACCOUNT_TOKEN_SECRET_TYPE and (namespace is None or secret.metadata.namespace == namespace):
+                yield secret
+
+    def iter_workloads(self):
+        # api.records.WorkloadRecord objects of every WORKLOAD_KINDS kind. Clients that can't read them yield none.
+        yield from ()
@@ -1,13 +1,13 @@
 from .static_api_client import StaticApiClient
-from .api_client import RegularApiClient
+from .api_client import RegularApiClient, DEFAULT_PAGE_SIZE
 
 class ApiClientFactory:
     @staticmethod
-    def get_client(use_static=False, input_file=None):
+    def get_client(use_static=False, input_file=None, page_size=DEFAULT_PAGE_SIZE, request_timeout=None, raw_json=False):
         if use_static:
             return StaticApiClient(input_file=input_file)
         else:
-            return RegularApiClient()
+            return RegularApiClient(page_size=page_size, request_timeout=request_timeout, raw_json=raw_json)
 
 
 #api_client = ApiClientFactory.get_client(use_static=True, input_file="/home/noamr/Documents/KubiScan/combined.json")
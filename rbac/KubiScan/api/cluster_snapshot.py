@@ -0,0 +1,223 @@
+from concurrent.futures import ThreadPoolExecutor
+
+ROLES = 'roles'
+CLUSTER_ROLES = 'cluster_roles'
+ROLE_BINDINGS = 'role_bindings'
+CLUSTER_ROLE_BINDINGS = 'cluster_role_bindings'
+PODS = 'pods'
+SERVICE_ACCOUNTS = 'service_accounts'
+SERVICE_ACCOUNT_TOKEN_SECRETS = 'service_account_token_secrets'
+WORKLOADS = 'workloads'
+
+RBAC_COLLECTIONS = [ROLES, CLUSTER_ROLES, ROLE_BINDINGS, CLUSTER_ROLE_BINDINGS]
+
+# Number of collections listed at the same time by prefetch().
+DEFAULT_MAX_WORKERS = 5
+
+
+class ClusterSnapshot:
+    """
+    Holds the cluster objects used by the engine during a single run.
+
+    Every collection is listed through the BaseApiClient the first time it is needed
+    and the same list is returned for the rest of the run, so a scan that goes over the
+    bindings several times (like '-a') still issues a single LIST per collection.
+    Collections are read with the client's iter_* methods, so a paging client only
+    holds one raw page in memory while the snapshot is filled.
+    """
+
+    def __init__(self, api_client, max_workers=DEFAULT_MAX_WORKERS):
+        self.api_client = api_client
+        self.max_workers = max_workers
+        self._collections = {}
+        self._pods_by_namespace = {}
+        self._all_pods_indexed = False
+        self._token_secrets_by_namespace = {}
+        self._all_token_secrets_indexed = False
+        self._roles_by_name = None
+        self._roles_index = None
+        self._cluster_roles_by_name = None
+        self._role_bindings_index = None
+        self._cluster_role_bindings_by_name = None
+        self._service_accounts_by_namespace = None
+        self._service_accounts_by_secret = None
+        self._derived = {}
+        self._list_functions = {
+            ROLES: api_client.iter_roles_for_all_namespaces,
+            CLUSTER_ROLES: api_client.iter_cluster_role,
+            ROLE_BINDINGS: api_client.iter_role_binding_for_all_namespaces,
+            CLUSTER_ROLE_BINDINGS: api_client.iter_cluster_role_binding,
+            PODS: api_client.iter_pod_for_all_namespaces,
+            SERVICE_ACCOUNTS: api_client.iter_service_account_for_all_namespaces,
+            SERVICE_ACCOUNT_TOKEN_SECRETS: api_client.iter_service_account_token_secrets,
+            WORKLOADS: api_client.iter_workloads,
+        }
+
+    def _list_collection(self, name):
+        return list(self._list_functions[name]())
+
+    def _get_collection(self, name):
+        if name not in self._collections:
+            self._collections[name] = self._list_collection(name)
+        return self._collections[name]
+
+    def prefetch(self, names):
+        """
+        Lists the collections that were not fetched yet concurrently, using up to 'max_workers' threads.
+        The independent LIST calls overlap instead of paying the API latency one after another.
+
+        :param names: collection names (ROLES, CLUSTER_ROLES, ...).
+        :return: dict of collection name to its items.
+        """
+        missing = [name for name in names if name not in self._collections]
+        if len(missing) > 1 and self.max_workers > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as executor:
+                futures = {name: executor.submit(self._list_collection, name) for name in missing}
+                for name, future in futures.items():
+                    self._collections[name] = future.result()
+
+        return {name: self._get_collection(name) for name in names}
+
+    @property
+    def roles(self):
+        return self._get_collection(ROLES)
+
+    @property
+    def cluster_roles(self):
+        return self._get_collection(CLUSTER_ROLES)
+
+    @property
+    def role_bindings(self):
+        return self._get_collection(ROLE_BINDINGS)
+
+    @property
+    def cluster_role_bindings(self):
+        return self._get_collection(CLUSTER_ROLE_BINDINGS)
+
+    @property
+    def pods(self):
+        return self._get_collection(PODS)
+
+    @property
+    def service_accounts(self):
+        return self._get_collection(SERVICE_ACCOUNTS)
+
+    @property
+    def service_account_token_secrets(self):
+        return self._get_collection(SERVICE_ACCOUNT_TOKEN_SECRETS)
+
+    @property
+    def workloads(self):
+        return self._get_collection(WORKLOADS)
+
+    def get_pods(self, namespace=None):
+        if namespace is None:
+            return self.pods
+        if PODS in self._collections:
+            # The pods of all namespaces were fetched, they are grouped by namespace once.
+            if not self._all_pods_indexed:
+                self._pods_by_namespace = self._group_by_namespace(self.pods)
+                self._all_pods_indexed = True
+            return self._pods_by_namespace.get(namespace, [])
+        if namespace not in self._pods_by_namespace:
+            self._pods_by_namespace[namespace] = list(self.api_client.iter_namespaced_pod(namespace))
+        return self._pods_by_namespace[namespace]
+
+    @staticmethod
+    def _index_by_name(items):
+        index = {}
+        for item in items:
+            # Keeps the first object with the name, like a linear search.
+            index.setdefault(item.metadata.name, item)
+        return index
+
+    @staticmethod
+    def _group_by_namespace(items):
+        groups = {}
+        for item in items:
+            groups.setdefault(item.metadata.namespace, []).append(item)
+        return groups
+
+    @staticmethod
+    def _index_by_namespace_and_name(items):
+        index = {}
+        for item in items:
+            index.setdefault((item.metadata.namespace, item.metadata.name), item)
+        return index
+
+    def is_fetched(self, name):
+        return name in self._collections
+
+    def get_role(self, name, namespace=None):
+        # Without a namespace, the first Role with the name in any namespace.
+        if namespace is None:
+            if self._roles_by_name is None:
+                self._roles_by_name = self._index_by_name(self.roles)
+            return self._roles_by_name.get(name)
+        if self._roles_index is None:
+            self._roles_index = self._index_by_namespace_and_name(self.roles)
+        return self._roles_index.get((namespace, name))
+
+    def get_cluster_role(self, name):
+        if self._cluster_roles_by_name is None:
+            self._cluster_roles_by_name = self._index_by_name(self.cluster_roles)
+        return self._cluster_roles_by_name.get(name)
+
+    def get_role_binding(self, name, namespace):
+        if self._role_bindings_index is None:
+            self._role_bindings_index = self._index_by_namespace_and_name(self.role_bindings)
+        return self._role_bindings_index.get((namespace, name))
+
+    def get_cluster_role_binding(self, name):
+        if self._cluster_role_bindings_by_name is None:
+            self._cluster_role_bindings_by_name = self._index_by_name(self.cluster_role_bindings)
+        return self._cluster_role_bindings_by_name.get(name)
+
+    def _index_service_accounts(self):
+        self._service_accounts_by_namespace = {}
+        self._service_accounts_by_secret = {}
+        for service_account in self.service_accounts:
+            namespace = service_account.metadata.namespace
+            self._service_accounts_by_namespace.setdefault(namespace, []).append(service_account)
+            for secret in service_account.secrets or []:
+                # The secrets of a service account are in its namespace.
+                self._service_accounts_by_secret.setdefault((namespace, secret.name), service_account)
+
+    def get_service_accounts_by_namespace(self):
+        if self._service_accounts_by_namespace is None:
+            self._index_service_accounts()
+        return self._service_accounts_by_namespace
+
+    def get_service_account_by_secret(self, secret_name, namespace):
+        """
+        :return: the first service account of 'namespace' that lists the secret 'secret_name', or None.
+        """
+        if self._service_accounts_by_secret is None:
+            self._index_service_accounts()
+        return self._service_accounts_by_secret.get((namespace, secret_name))
+
+    def get_derived(self, key, factory):
+        """
+        Returns a value computed from the snapshot (an index or a memo of the engine), creating it
+        with factory() the first time. It is dropped together with the snapshot.
+        """
+        if key not in self._derived:
+            self._derived[key] = factory()
+        return self._derived[key]
+
+    def get_service_account_token_secret(self, name, namespace):
+        """
+        Only the service account token secrets are fetched. They are taken from the all namespaces list
+        when it was fetched (see prefetch()), otherwise they are listed once per namespace.
+        """
+        if SERVICE_ACCOUNT_TOKEN_SECRETS in self._collections and not self._all_token_secrets_indexed:
+            for secret in self.service_account_token_secrets:
+                self._token_secrets_by_namespace.setdefault(secret.metadata.namespace, {}).setdefault(secret.metadata.name, secret)
+            self._all_token_secrets_indexed = True
+        if namespace not in self._token_secrets_by_namespace:
+            if self._all_token_secrets_indexed:
+                self._token_secrets_by_namespace[namespace] = {}
+            else:
+                self._token_secrets_by_namespace[namespace] = {
+                    secret.metadata.name: secret for secret in self.api_client.iter_service_account_token_secrets(namespace)}
+        return self._token_secrets_by_namespace[namespace].get(name)
@@ -1,10 +1,24 @@
 # config.py
+from .cluster_snapshot import ClusterSnapshot, DEFAULT_MAX_WORKERS
 
 class Config:
     api_client = None
+    snapshot = None
+    workers = DEFAULT_MAX_WORKERS
 
 def set_api_client(client):
     Config.api_client = client
+    Config.snapshot = None
 
 def get_api_client():
     return Config.api_client
+
+def set_workers(workers):
+    Config.workers = workers
+    if Config.snapshot is not None:
+        Config.snapshot.max_workers = workers
+
+def get_snapshot():
+    if Config.snapshot is None:
+        Config.snapshot = ClusterSnapshot(Config.api_client, max_workers=Config.workers)
+    return Config.snapshot
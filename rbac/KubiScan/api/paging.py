@@ -0,0 +1,60 @@
+import json
+
+from kubernetes.client.rest import ApiException
+
+# Status of a page requested with an expired continue token.
+EXPIRED_STATUS = 410
+
+
+def get_expired_continue(e):
+    """
+    :return: the continue token of a 410 Gone response, which goes on with an inconsistent list, or None.
+    """
+    try:
+        status = json.loads(e.body)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(status, dict):
+        return None
+    return (status.get('metadata') or {}).get('continue')
+
+
+def iter_paged_items(list_page, page_size, get_uid):
+    """
+    Yields the items of a LIST, following the continue tokens.
+
+    :param list_page: list_page(limit, _continue) returns the (items, continue token) of a page.
+    :param get_uid: returns the uid of an item.
+
+    A continue token expires (410 Gone) when the pages of a large collection take longer to read
+    than the API server keeps the first page version. The list then goes on with the token of
+    the 410 response, so objects changed since the first page may be missed or seen in their
+    new version. If the response has no token, the collection is listed again without paging
+    and the items already yielded are skipped.
+    """
+    yielded_uids = set()
+    limit = page_size
+    _continue = None
+    while True:
+        try:
+            items, next_continue = list_page(limit, _continue)
+        except ApiException as e:
+            if e.status != EXPIRED_STATUS or not _continue:
+                raise
+            _continue = get_expired_continue(e)
+            if _continue:
+                print("The list continue token expired, continuing with an inconsistent list")
+            else:
+                print("The list continue token expired, listing again without paging")
+                limit = None
+            continue
+        for item in items or []:
+            uid = get_uid(item)
+            if uid is not None:
+                if uid in yielded_uids:
+                    continue
+                yielded_uids.add(uid)
+            yield item
+        _continue = next_continue
+        if not _continue:
+            break
@@ -0,0 +1,373 @@
+"""
+Lightweight records built straight from the API JSON.
+
+The kubernetes client turns every LIST response into a full tree of V1* models through
+its recursive deserializer, which is where most of the CPU time of a large scan goes.
+The engine only reads a handful of fields, so when a client works in raw JSON mode
+(BaseApiClient.raw_json) it maps the items into these __slots__ records instead.
+The records expose the same attribute names as the V1* models they replace, so the
+engine works with both and produces the same findings.
+"""
+from dateutil.parser import parse as parse_datetime
+from kubernetes.client import ApiClient
+
+_model_api_client = None
+
+
+def deserialize_model(data, klass):
+    # Uses the kubernetes client deserializer, only for the few places that need a real model (to_dict()).
+    global _model_api_client
+    if _model_api_client is None:
+        _model_api_client = ApiClient()
+    return _model_api_client._ApiClient__deserialize(data, klass)
+
+
+def _record(record_class, data):
+    return record_class(data) if data is not None else None
+
+
+def _records(record_class, items):
+    return [record_class(item) for item in items] if items is not None else None
+
+
+class Record(object):
+    __slots__ = ()
+
+
+class ModelBackedRecord(Record):
+    """
+    A record that keeps its raw JSON so it can still be converted to its V1* model.
+    Used for the specs and security contexts that are printed with to_dict().
+    """
+    __slots__ = ('_raw',)
+    model = None
+
+    def to_dict(self):
+        return deserialize_model(self._raw, self.model).to_dict()
+
+
+class OwnerReferenceRecord(Record):
+    __slots__ = ('api_version', 'kind', 'name', 'uid', 'controller')
+
+    def __init__(self, data):
+        self.api_version = data.get('apiVersion')
+        self.kind = data.get('kind')
+        self.name = data.get('name')
+        self.uid = data.get('uid')
+        self.controller = data.get('controller')
+
+
+class ObjectMetaRecord(Record):
+    __slots__ = ('name', 'namespace', 'uid', 'labels', 'annotations', 'creation_timestamp', 'owner_references')
+
+    def __init__(self, data):
+        self.name = data.get('name')
+        self.namespace = data.get('namespace')
+        self.uid = data.get('uid')
+        self.labels = data.get('labels')
+        self.annotations = data.get('annotations')
+        creation_timestamp = data.get('creationTimestamp')
+        self.creation_timestamp = parse_datetime(creation_timestamp) if creation_timestamp else None
+        self.owner_references = _records(OwnerReferenceRecord, data.get('ownerReferences'))
+
+
+class PolicyRuleRecord(Record):
+    __slots__ = ('api_groups', 'non_resource_ur_ls', 'resource_names', 'resources', 'verbs')
+
+    def __init__(self, data):
+        self.api_groups = data.get('apiGroups')
+        self.non_resource_ur_ls = data.get('nonResourceURLs')
+        self.resource_names = data.get('resourceNames')
+        self.resources = data.get('resources')
+        self.verbs = data.get('verbs')
+
+
+class RoleRecord(Record):
+    """Role or ClusterRole."""
+    __slots__ = ('kind', 'metadata', 'rules')
+
+    def __init__(self, data, kind=None):
+        self.kind = data.get('kind') or kind
+        self.metadata = ObjectMetaRecord(data.get('metadata') or {})
+        self.rules = _records(PolicyRuleRecord, data.get('rules'))
+
+
+class RoleRefRecord(Record):
+    __slots__ = ('api_group', 'kind', 'name')
+
+    def __init__(self, data):
+        self.api_group = data.get('apiGroup')
+        self.kind = data.get('kind')
+        self.name = data.get('name')
+
+
+class SubjectRecord(Record):
+    __slots__ = ('api_group', 'kind', 'name', 'namespace')
+
+    def __init__(self, data):
+        self.api_group = data.get('apiGroup')
+        self.kind = data.get('kind')
+        self.name = data.get('name')
+        self.namespace = data.get('namespace')
+
+
+class RoleBindingRecord(Record):
+    """RoleBinding or ClusterRoleBinding."""
+    __slots__ = ('kind', 'metadata', 'role_ref', 'subjects')
+
+    def __init__(self, data, kind=None):
+        self.kind = data.get('kind') or kind
+        self.metadata = ObjectMetaRecord(data.get('metadata') or {})
+        self.role_ref = _record(RoleRefRecord, data.get('roleRef'))
+        self.subjects = _records(SubjectRecord, data.get('subjects'))
+
+
+class CapabilitiesRecord(Record):
+    __slots__ = ('add', 'drop')
+
+    def __init__(self, data):
+        self.add = data.get('add')
+        self.drop = data.get('drop')
+
+
+class SecurityContextRecord(ModelBackedRecord):
+    __slots__ = ('run_as_user', 'privileged', 'allow_privilege_escalation', 'capabilities')
+    model = 'V1SecurityContext'
+
+    def __init__(self, data):
+        self._raw = data
+        self.run_as_user = data.get('runAsUser')
+        self.privileged = data.get('privileged')
+        self.allow_privilege_escalation = data.get('allowPrivilegeEscalation')
+        self.capabilities = _record(CapabilitiesRecord, data.get('capabilities'))
+
+
+class PodSecurityContextRecord(ModelBackedRecord):
+    __slots__ = ('run_as_user',)
+    model = 'V1PodSecurityContext'
+
+    def __init__(self, data):
+        self._raw = data
+        self.run_as_user = data.get('runAsUser')
+
+
+class VolumeMountRecord(Record):
+    __slots__ = ('name', 'mount_path', 'read_only')
+
+    def __init__(self, data):
+        self.name = data.get('name')
+        self.mount_path = data.get('mountPath')
+        self.read_only = data.get('readOnly')
+
+
+class ContainerPortRecord(Record):
+    __slots__ = ('name', 'container_port', 'host_port', 'protocol')
+
+    def __init__(self, data):
+        self.name = data.get('name')
+        self.container_port = data.get('containerPort')
+        self.host_port = data.get('hostPort')
+        self.protocol = data.get('protocol')
+
+
+class SecretKeySelectorRecord(Record):
+    __slots__ = ('name', 'key')
+
+    def __init__(self, data):
+        self.name = data.get('name')
+        self.key = data.get('key')
+
+
+class EnvVarSourceRecord(Record):
+    __slots__ = ('secret_key_ref',)
+
+    def __init__(self, data):
+        self.secret_key_ref = _record(SecretKeySelectorRecord, data.get('secretKeyRef'))
+
+
+class EnvVarRecord(Record):
+    __slots__ = ('name', 'value', 'value_from')
+
+    def __init__(self, data):
+        self.name = data.get('name')
+        self.value = data.get('value')
+        self.value_from = _record(EnvVarSourceRecord, data.get('valueFrom'))
+
+
+class ContainerRecord(ModelBackedRecord):
+    __slots__ = ('name', 'image', 'ports', 'env', 'volume_mounts', 'security_context')
+    model = 'V1Container'
+
+    def __init__(self, data):
+        self._raw = data
+        self.name = data.get('name')
+        self.image = data.get('image')
+        self.ports = _records(ContainerPortRecord, data.get('ports'))
+        self.env = _records(EnvVarRecord, data.get('env'))
+        self.volume_mounts = _records(VolumeMountRecord, data.get('volumeMounts'))
+        self.security_context = _record(SecurityContextRecord, data.get('securityContext'))
+
+
+class ServiceAccountTokenProjectionRecord(Record):
+    __slots__ = ('audience', 'expiration_seconds', 'path')
+
+    def __init__(self, data):
+        self.audience = data.get('audience')
+        self.expiration_seconds = data.get('expirationSeconds')
+        self.path = data.get('path')
+
+
+class VolumeProjectionRecord(Record):
+    __slots__ = ('service_account_token',)
+
+    def __init__(self, data):
+        self.service_account_token = _record(ServiceAccountTokenProjectionRecord, data.get('serviceAccountToken'))
+
+
+class ProjectedVolumeSourceRecord(Record):
+    __slots__ = ('sources',)
+
+    def __init__(self, data):
+        self.sources = _records(VolumeProjectionRecord, data.get('sources'))
+
+
+class SecretVolumeSourceRecord(Record):
+    __slots__ = ('secret_name',)
+
+    def __init__(self, data):
+        self.secret_name = data.get('secretName')
+
+
+class HostPathVolumeSourceRecord(Record):
+    __slots__ = ('path', 'type')
+
+    def __init__(self, data):
+        self.path = data.get('path')
+        self.type = data.get('type')
+
+
+class VolumeRecord(Record):
+    __slots__ = ('name', 'projected', 'secret', 'host_path')
+
+    def __init__(self, data):
+        self.name = data.get('name')
+        self.projected = _record(ProjectedVolumeSourceRecord, data.get('projected'))
+        self.secret = _record(SecretVolumeSourceRecord, data.get('secret'))
+        self.host_path = _record(HostPathVolumeSourceRecord, data.get('hostPath'))
+
+
+class PodSpecRecord(ModelBackedRecord):
+    __slots__ = ('containers', 'volumes', 'service_account', 'service_account_name', 'node_name',
+                 'host_ipc', 'host_pid', 'host_network', 'security_context', 'automount_service_account_token')
+    model = 'V1PodSpec'
+
+    def __init__(self, data):
+        self._raw = data
+        self.containers = _records(ContainerRecord, data.get('containers'))
+        self.volumes = _records(VolumeRecord, data.get('volumes'))
+        self.service_account = data.get('serviceAccount')
+        self.service_account_name = data.get('serviceAccountName')
+        self.node_name = data.get('nodeName')
+        self.host_ipc = data.get('hostIPC')
+        self.host_pid = data.get('hostPID')
+        self.host_network = data.get('hostNetwork')
+        self.security_context = _record(PodSecurityContextRecord, data.get('securityContext'))
+        self.automount_service_account_token = data.get('automountServiceAccountToken')
+
+
+class ContainerStateRunningRecord(Record):
+    __slots__ = ('started_at',)
+
+    def __init__(self, data):
+        self.started_at = data.get('startedAt')
+
+
+class ContainerStateRecord(Record):
+    __slots__ = ('running',)
+
+    def __init__(self, data):
+        self.running = _record(ContainerStateRunningRecord, data.get('running'))
+
+
+class ContainerStatusRecord(Record):
+    __slots__ = ('name', 'ready', 'state')
+
+    def __init__(self, data):
+        self.name = data.get('name')
+        self.ready = data.get('ready')
+        self.state = _record(ContainerStateRecord, data.get('state'))
+
+
+class PodStatusRecord(Record):
+    __slots__ = ('phase', 'container_statuses')
+
+    def __init__(self, data):
+        self.phase = data.get('phase')
+        self.container_statuses = _records(ContainerStatusRecord, data.get('containerStatuses'))
+
+
+class PodRecord(Record):
+    __slots__ = ('kind', 'metadata', 'spec', 'status')
+
+    def __init__(self, data):
+        self.kind = data.get('kind')
+        self.metadata = ObjectMetaRecord(data.get('metadata') or {})
+        self.spec = _record(PodSpecRecord, data.get('spec'))
+        self.status = _record(PodStatusRecord, data.get('status'))
+
+
+class ObjectReferenceRecord(Record):
+    __slots__ = ('name', 'namespace')
+
+    def __init__(self, data):
+        self.name = data.get('name')
+        self.namespace = data.get('namespace')
+
+
+def get_workload_pod_data(data, kind):
+    """
+    :return: the pod template of a workload as a pod named after the workload.
+    """
+    spec = data.get('spec') or {}
+    if kind == 'CronJob':
+        spec = (spec.get('jobTemplate') or {}).get('spec') or {}
+    template = spec.get('template') or {}
+    workload_metadata = data.get('metadata') or {}
+    metadata = dict(template.get('metadata') or {}, name=workload_metadata.get('name'),
+                    namespace=workload_metadata.get('namespace'))
+    return {'kind': 'Pod', 'metadata': metadata, 'spec': template.get('spec') or {}}
+
+
+class WorkloadRecord(Record):
+    """
+    A controller with a pod template (Deployment, DaemonSet, CronJob...). 'template' is the
+    pod template as a pod named after the workload, so the pod checks run on it as is.
+    """
+    __slots__ = ('kind', 'metadata', 'replicas', 'template')
+
+    def __init__(self, data, kind=None, to_pod=PodRecord):
+        # The items of a LIST response have no kind.
+        self.kind = data.get('kind') or kind
+        self.metadata = ObjectMetaRecord(data.get('metadata') or {})
+        self.replicas = (data.get('spec') or {}).get('replicas')
+        self.template = to_pod(get_workload_pod_data(data, self.kind))
+
+
+class ServiceAccountRecord(Record):
+    __slots__ = ('kind', 'metadata', 'secrets', 'automount_service_account_token')
+
+    def __init__(self, data):
+        self.kind = data.get('kind')
+        self.metadata = ObjectMetaRecord(data.get('metadata') or {})
+        self.secrets = _records(ObjectReferenceRecord, data.get('secrets'))
+        self.automount_service_account_token = data.get('automountServiceAccountToken')
+
+
+class SecretRecord(Record):
+    __slots__ = ('kind', 'metadata', 'type', 'data')
+
+    def __init__(self, data):
+        self.kind = data.get('kind')
+        self.metadata = ObjectMetaRecord(data.get('metadata') or {})
+        self.type = data.get('type')
+        self.data = data.get('data')
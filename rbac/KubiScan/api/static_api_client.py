@@ -1,53 +1,85 @@
-import json
-import yaml
 import os
 from datetime import datetime
-from .base_client_api import BaseApiClient
+from .base_client_api import BaseApiClient, WORKLOAD_KINDS
+from .records import WorkloadRecord
+from .streaming_loader import iter_json_items, iter_yaml_items
 from kubernetes.client import (
     V1VolumeProjection, V1ServiceAccountTokenProjection, V1SecretProjection, V1DownwardAPIProjection, 
     V1RoleList, V1Role, V1ObjectMeta, V1PolicyRule, V1RoleBinding, V1RoleRef, V1Subject, 
     V1RoleBindingList, V1PodList, V1Pod, V1PodSpec, V1Container, V1Volume, V1PodStatus, 
-    V1SecurityContext, V1HostPathVolumeSource, V1ProjectedVolumeSource,V1VolumeMount,V1ConfigMapProjection,
-    V1DownwardAPIVolumeFile,V1ObjectFieldSelector,V1ContainerStatus,V1Capabilities,V1PodSecurityContext,V1ContainerPort
+    V1SecurityContext, V1HostPathVolumeSource, V1SecretVolumeSource, V1ProjectedVolumeSource,V1VolumeMount,V1ConfigMapProjection,
+    V1DownwardAPIVolumeFile,V1ObjectFieldSelector,V1ContainerStatus,V1Capabilities,V1PodSecurityContext,V1ContainerPort,
+    V1ServiceAccount, V1ServiceAccountList, V1ObjectReference, V1Secret, V1SecretList, V1OwnerReference
 )
 
+# Kinds read by KubiScan, every other item of the input file is dropped while loading.
+SUPPORTED_KINDS = ('Role', 'ClusterRole', 'RoleBinding', 'ClusterRoleBinding', 'Pod', 'ServiceAccount', 'Secret') + WORKLOAD_KINDS
+
 class StaticApiClient(BaseApiClient):
     def __init__(self, input_file):
-        self.combined_data = self.load_combined_file(input_file)
-        self.all_roles = self.construct_v1_role_list("Role", self.get_resources('Role'))
-        self.all_cluster_roles = self.construct_v1_role_list("ClusterRole", self.get_resources('ClusterRole'))
-        self.all_role_bindings = self.construct_v1_role_binding_list("RoleBinding", self.get_resources('RoleBinding'))
-        self.all_cluster_role_bindings = self.construct_v1_role_binding_list("ClusterRoleBinding", self.get_resources('ClusterRoleBinding'))
-        self.all_pods = self.construct_v1_pod_list("Pod", self.get_resources('Pod'))
+        resources = self.load_resources(input_file)
+        # Each bucket is released right after it is converted, so the raw dicts and the
+        # V1 objects of a kind are never both kept for the whole file.
+        self.all_roles = self.construct_v1_role_list("Role", resources.pop('Role'))
+        self.all_cluster_roles = self.construct_v1_role_list("ClusterRole", resources.pop('ClusterRole'))
+        self.all_role_bindings = self.construct_v1_role_binding_list("RoleBinding", resources.pop('RoleBinding'))
+        self.all_cluster_role_bindings = self.construct_v1_role_binding_list("ClusterRoleBinding", resources.pop('ClusterRoleBinding'))
+        self.all_pods = self.construct_v1_pod_list("Pod", resources.pop('Pod'))
+        self.all_service_accounts = self.construct_v1_service_account_list("ServiceAccount", resources.pop('ServiceAccount'))
+        self.all_secrets = self.construct_v1_secret_list("Secret", resources.pop('Secret'))
+        self.all_workloads = self.construct_workload_list(resources)
+        self.build_indexes()
+
+    def build_indexes(self):
+        # The read_* and list_namespaced_* calls are made once per binding/namespace by the engine,
+        # so they look the objects up in these dicts instead of scanning the lists.
+        self.roles_index = self.index_by_namespace_and_name(self.all_roles.items)
+        self.cluster_roles_index = self.index_by_namespace_and_name(self.all_cluster_roles.items, cluster_scoped=True)
+        self.role_bindings_index = self.index_by_namespace_and_name(self.all_role_bindings.items)
+        self.pods_by_namespace = {}
+        for pod in self.all_pods.items:
+            self.pods_by_namespace.setdefault(pod.metadata.namespace, []).append(pod)
+
+    @staticmethod
+    def index_by_namespace_and_name(items, cluster_scoped=False):
+        index = {}
+        for item in items:
+            namespace = None if cluster_scoped else item.metadata.namespace
+            # setdefault keeps the first object with the key, like the linear scan it replaces.
+            index.setdefault((namespace, item.metadata.name), item)
+        return index
 
-    def load_combined_file(self, input_file):
+    def load_resources(self, input_file):
         _, file_extension = os.path.splitext(input_file)
         file_format = 'json' if file_extension.lower() == '.json' else 'yaml' if file_extension.lower() == '.yaml' else None
         
         if not file_format:
             print("Unsupported file extension. Only '.yaml' and '.json' are supported.")
-            return None
+            return self.bucket_resources([])
 
         try:
             with open(input_file, 'r') as file:
                 if file_format == "yaml":
-                    documents = list(yaml.safe_load_all(file))
-                    return documents
+                    return self.bucket_resources(iter_yaml_items(file))
                 elif file_format == "json":
-                    return json.load(file)
+                    return self.bucket_resources(iter_json_items(file))
         except FileNotFoundError:
             print(f"File not found: {input_file}")
-            return None
+            return self.bucket_resources([])
         except Exception as e:
             print(f"Error reading file: {e}")
-            return None
+            return self.bucket_resources([])
 
-    def get_resources(self, kind):
-        resources = []
-        if self.combined_data:
-            for entry in self.combined_data:
-                if 'items' in entry and isinstance(entry['items'], list):
-                    resources.extend(item for item in entry['items'] if item.get('kind') == kind)
+    def bucket_resources(self, items):
+        """
+        Splits the items by kind as they are read from the file.
+        Items of kinds that are not in SUPPORTED_KINDS are skipped.
+        """
+        resources = {kind: [] for kind in SUPPORTED_KINDS}
+        for item in items:
+            bucket = resources.get(item.get('kind'))
+            if bucket is not None:
+                bucket.append(item)
         return resources
 
 
@@ -153,7 +185,16 @@ class StaticApiClient(BaseApiClient):
                     annotations=metadata.get('annotations', {}),
                     creation_timestamp=metadata.get('creationTimestamp', None),
                     uid=metadata.get('uid', None),
-                    resource_version=metadata.get('resourceVersion', None)
+                    resource_version=metadata.get('resourceVersion', None),
+                    owner_references=[
+                        V1OwnerReference(
+                            api_version=owner_reference.get('apiVersion', ''),
+                            kind=owner_reference.get('kind', ''),
+                            name=owner_reference.get('name', ''),
+                            uid=owner_reference.get('uid', ''),
+                            controller=owner_reference.get('controller', None)
+                        ) for owner_reference in metadata.get('ownerReferences', [])
+                    ]
                 ),
                 spec=V1PodSpec(
                     security_context=pod_security_context,
@@ -164,6 +205,7 @@ class StaticApiClient(BaseApiClient):
                     host_pid=spec.get('hostPid', False),  
                     host_network=spec.get('hostNetwork', False),
                     restart_policy=spec.get('restartPolicy', 'Always'),
+                    automount_service_account_token=spec.get('automountServiceAccountToken', None),
                     containers=[
                         V1Container(
                             name=container['name'],
@@ -202,23 +244,28 @@ class StaticApiClient(BaseApiClient):
                             name=volume.get('name'),
                             empty_dir=volume.get('emptyDir', {}),
                             persistent_volume_claim=volume.get('persistentVolumeClaim', {}),
+                            # Only the sources set in the file are built, a volume with a source object of
+                            # every type would look like a hostPath or a secret volume to the checks.
                             host_path=V1HostPathVolumeSource(
-                                path=volume.get('hostPath', {}).get('path', ''),
-                                type=volume.get('hostPath', {}).get('type', '')
-                            ),
+                                path=volume['hostPath'].get('path', ''),
+                                type=volume['hostPath'].get('type', '')
+                            ) if volume.get('hostPath') is not None else None,
+                            secret=V1SecretVolumeSource(
+                                secret_name=volume['secret'].get('secretName', None)
+                            ) if volume.get('secret') is not None else None,
                             projected=V1ProjectedVolumeSource(
                                 sources=[
                                     V1VolumeProjection(
                                         service_account_token=V1ServiceAccountTokenProjection(
-                                            path=source.get('serviceAccountToken', {}).get('path', ''),
-                                            expiration_seconds=source.get('serviceAccountToken', {}).get('expirationSeconds', None)
-                                        ),
+                                            path=source['serviceAccountToken'].get('path', ''),
+                                            expiration_seconds=source['serviceAccountToken'].get('expirationSeconds', None)
+                                        ) if source.get('serviceAccountToken') is not None else None,
                                         secret=V1SecretProjection(
-                                            name=source.get('secret', {}).get('name', None)
-                                        ),
+                                            name=source['secret'].get('name', None)
+                                        ) if source.get('secret') is not None else None,
                                         config_map=V1ConfigMapProjection(
-                                            name=source.get('configMap', {}).get('name', None)
-                                        ),
+                                            name=source['configMap'].get('name', None)
+                                        ) if source.get('configMap') is not None else None,
                                         downward_api=V1DownwardAPIProjection(
                                             items=[
                                                 V1DownwardAPIVolumeFile(
@@ -227,12 +274,12 @@ class StaticApiClient(BaseApiClient):
                                                         api_version=item.get('fieldRef', {}).get('apiVersion', 'v1'),
                                                         field_path=item.get('fieldRef', {}).get('fieldPath', '')
                                                     )
-                                                ) for item in source.get('downwardAPI', {}).get('items', [])
+                                                ) for item in source['downwardAPI'].get('items', [])
                                             ]
-                                        )
-                                    ) for source in volume.get('projected', {}).get('sources', [])
+                                        ) if source.get('downwardAPI') is not None else None
+                                    ) for source in volume['projected'].get('sources', [])
                                 ]
-                            )
+                            ) if volume.get('projected') is not None else None
                         ) for volume in spec.get('volumes', [])
                     ]
                 ),
@@ -251,6 +298,49 @@ class StaticApiClient(BaseApiClient):
             metadata={'resourceVersion': '1'}
         )
 
+    def construct_v1_service_account_list(self, kind, items):
+        v1_service_accounts = []
+        for item in items:
+            v1_service_account = V1ServiceAccount(
+                api_version=item.get('apiVersion', 'v1'),
+                kind=item.get('kind', 'ServiceAccount'),
+                metadata=self.parse_metadata(item['metadata']),
+                automount_service_account_token=item.get('automountServiceAccountToken', None),
+                secrets=[
+                    V1ObjectReference(
+                        name=secret.get('name'),
+                        namespace=secret.get('namespace')
+                    ) for secret in item.get('secrets', [])
+                ]
+            )
+            v1_service_accounts.append(v1_service_account)
+
+        return V1ServiceAccountList(
+            api_version="v1",
+            kind=f"{kind}List",
+            items=v1_service_accounts,
+            metadata={'resourceVersion': '1'}
+        )
+
+    def construct_v1_secret_list(self, kind, items):
+        v1_secrets = []
+        for item in items:
+            v1_secret = V1Secret(
+                api_version=item.get('apiVersion', 'v1'),
+                kind=item.get('kind', 'Secret'),
+                metadata=self.parse_metadata(item['metadata']),
+                type=item.get('type'),
+                data=item.get('data')
+            )
+            v1_secrets.append(v1_secret)
+
+        return V1SecretList(
+            api_version="v1",
+            kind=f"{kind}List",
+            items=v1_secrets,
+            metadata={'resourceVersion': '1'}
+        )
+
     def list_roles_for_all_namespaces(self):
         return self.all_roles
     
@@ -264,34 +354,38 @@ class StaticApiClient(BaseApiClient):
         return self.all_cluster_role_bindings.items
     
     def read_namespaced_role_binding(self, rolebinding_name, namespace):
-        for rolebinding in self.all_role_bindings.items:
-            if rolebinding.metadata.name == rolebinding_name and rolebinding.metadata.namespace == namespace:
-                return rolebinding
-        return None
+        return self.role_bindings_index.get((namespace, rolebinding_name))
     
     def read_namespaced_role(self, role_name, namespace):
-        for role in self.all_roles.items:
-            if role.metadata.name == role_name and role.metadata.namespace == namespace:
-                return role
-        return None
+        return self.roles_index.get((namespace, role_name))
     
     def read_cluster_role(self, role_name):
-        for role in self.all_cluster_roles.items:
-            if role.metadata.name == role_name:
-                return role
-        return None
+        return self.cluster_roles_index.get((None, role_name))
     
     def list_pod_for_all_namespaces(self, watch):
         return self.all_pods
 
-    def list_namespaced_pod(self, namespace):
-        # Filter the pods based on the namespace
-        filtered_pods = [pod for pod in self.all_pods.items if pod.metadata.namespace == namespace]
+    def construct_workload_list(self, resources):
+        # The pod templates are built like the pods of the file, so both are checked the same way.
+        workloads = []
+        for kind in WORKLOAD_KINDS:
+            for item in resources.pop(kind):
+                workloads.append(WorkloadRecord(item, kind=kind, to_pod=lambda pod: self.construct_v1_pod_list("Pod", [pod]).items[0]))
+        return workloads
 
-        # Return the filtered pods as a V1PodList
+    def list_namespaced_pod(self, namespace):
         return V1PodList(
             api_version="v1",
             kind="PodList",
-            items=filtered_pods,
+            items=list(self.pods_by_namespace.get(namespace, [])),
             metadata={'resourceVersion': '1'}
-    )
\ No newline at end of file
+    )
+
+    def list_service_account_for_all_namespaces(self):
+        return self.all_service_accounts
+
+    def list_secret_for_all_namespaces(self):
+        return self.all_secrets
+
+    def iter_workloads(self):
+        return iter(self.all_workloads)
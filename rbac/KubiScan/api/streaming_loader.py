@@ -0,0 +1,171 @@
+"""
+Incremental readers for the static scan input files.
+
+Both readers yield the objects of the 'items' list of every document one at a time, so
+the StaticApiClient can bucket them without the whole document tree being in memory.
+YAML aliases can refer to an anchor anywhere earlier in the same document, so the
+composed nodes of the anchors are kept until the end of each document: memory is
+bounded per YAML document, not per item.
+"""
+import json
+import re
+
+import yaml
+from yaml.composer import Composer
+from yaml.constructor import SafeConstructor
+from yaml.events import (MappingEndEvent, MappingStartEvent, SequenceEndEvent, SequenceStartEvent,
+                         StreamEndEvent)
+from yaml.resolver import Resolver
+
+try:
+    # libyaml parser. CSafeLoader can't be used as is because it does not expose compose_node(),
+    # which is needed to build the items one by one.
+    from yaml.cyaml import CParser
+
+    class _YamlItemLoader(CParser, Composer, SafeConstructor, Resolver):
+        def __init__(self, stream):
+            CParser.__init__(self, stream)
+            Composer.__init__(self)
+            SafeConstructor.__init__(self)
+            Resolver.__init__(self)
+except ImportError:
+    _YamlItemLoader = yaml.SafeLoader
+
+JSON_CHUNK_SIZE = 1024 * 1024
+
+
+def iter_yaml_items(file):
+    loader = _YamlItemLoader(file)
+    try:
+        # StreamStartEvent
+        loader.get_event()
+        while not loader.check_event(StreamEndEvent):
+            # DocumentStartEvent
+            loader.get_event()
+            if loader.check_event(MappingStartEvent):
+                loader.get_event()
+                while not loader.check_event(MappingEndEvent):
+                    key = _load_yaml_value(loader)
+                    if key == 'items' and loader.check_event(SequenceStartEvent):
+                        loader.get_event()
+                        while not loader.check_event(SequenceEndEvent):
+                            yield _load_yaml_value(loader)
+                        loader.get_event()
+                    else:
+                        _load_yaml_value(loader)
+                loader.get_event()
+            else:
+                _load_yaml_value(loader)
+            # DocumentEndEvent
+            loader.get_event()
+            # The anchors are scoped to their document, like in compose_document().
+            loader.anchors = {}
+    finally:
+        loader.dispose()
+
+
+def _load_yaml_value(loader):
+    return loader.construct_document(loader.compose_node(None, None))
+
+
+def iter_json_items(file, chunk_size=JSON_CHUNK_SIZE):
+    return JsonItemReader(file, chunk_size).iter_items()
+
+
+class JsonItemReader:
+    """
+    Reads a JSON array of List documents (or a single List document) and yields the
+    objects of their 'items' arrays. The file is read in chunks and only the item
+    being decoded is kept in the buffer.
+    """
+    _whitespace = re.compile(r'[ \t\n\r]*')
+
+    def __init__(self, file, chunk_size=JSON_CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        data = self.file.read(self.chunk_size)
+        if not data:
+            self.eof = True
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+
+    def _peek(self):
+        while True:
+            self.pos = self._whitespace.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof:
+                return ''
+            self._fill()
+
+    def _expect(self, char):
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expecting '{char}' at position {self.pos}, found '{found}'")
+        self.pos += 1
+
+    def _decode_value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._fill()
+                continue
+            # A number at the end of the buffer may continue in the next chunk.
+            if end == len(self.buffer) and not self.eof:
+                self._fill()
+                continue
+            self.pos = end
+            return value
+
+    def _iter_array(self, read_element):
+        self._expect('[')
+        if self._peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield from read_element()
+            if self._peek() == ',':
+                self.pos += 1
+            else:
+                self._expect(']')
+                return
+
+    def _iter_document_items(self):
+        if self._peek() != '{':
+            self._decode_value()
+            return
+        self.pos += 1
+        if self._peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self._decode_value()
+            self._expect(':')
+            if key == 'items' and self._peek() == '[':
+                yield from self._iter_array(self._read_item)
+            else:
+                self._decode_value()
+            if self._peek() == ',':
+                self.pos += 1
+            else:
+                self._expect('}')
+                return
+
+    def _read_item(self):
+        yield self._decode_value()
+
+    def iter_items(self):
+        if self._peek() == '[':
+            yield from self._iter_array(self._iter_document_items)
+        else:
+            yield from self._iter_document_items()
@@ -0,0 +1,96 @@
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+DEFAULT_DEEP_SCAN_WORKERS = 10
+# Seconds, passed as '_request_timeout' to each exec. 60 is the kubernetes client default.
+DEFAULT_EXEC_TIMEOUT = 60
+# Execs started per second against the API server, 0 for no limit.
+DEFAULT_EXEC_RATE = 20
+# Seconds between two progress lines.
+PROGRESS_INTERVAL = 5
+# Containers executed for a group of containers sharing a token before the group is given up.
+# When the first ones fail (exec forbidden, timeout...) the next ones are likely to fail the same way.
+GROUP_READ_ATTEMPTS = 2
+
+
+class RateLimiter:
+    """Spaces the calls to acquire() by at least 1/rate seconds, across all the threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.lock = threading.Lock()
+        self.next_time = time.monotonic()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class ProgressReporter:
+    """Prints 'done/total' to stderr at most every 'interval' seconds, so the results on stdout stay clean."""
+
+    def __init__(self, total, description, interval=PROGRESS_INTERVAL, enabled=True):
+        self.total = total
+        self.description = description
+        self.interval = interval
+        self.enabled = enabled and total > 0
+        self.done = 0
+        self.started = time.monotonic()
+        self.last_report = self.started
+
+    def update(self):
+        self.done += 1
+        now = time.monotonic()
+        if self.enabled and (now - self.last_report >= self.interval or self.done == self.total):
+            self.last_report = now
+            print(f"{self.description}: {self.done}/{self.total} ({now - self.started:.0f}s)", file=sys.stderr)
+
+
+class DeepScanner:
+    """
+    Runs the exec based reads of the deep scan (-d) on a pool of 'max_workers' threads.
+    The execs of all the threads share one RateLimiter, so the API server never gets more
+    than 'exec_rate' new execs per second, and each exec is stopped after 'exec_timeout' seconds.
+    'all_containers' asks for an exec into every container instead of one per group of
+    containers with the same service account token. The images found without a shell are
+    kept in 'images_without_shell' so their other containers are not executed.
+    """
+
+    def __init__(self, max_workers=DEFAULT_DEEP_SCAN_WORKERS, exec_timeout=DEFAULT_EXEC_TIMEOUT,
+                 exec_rate=DEFAULT_EXEC_RATE, show_progress=True, all_containers=False):
+        self.max_workers = max(1, max_workers)
+        self.exec_timeout = exec_timeout
+        self.rate_limiter = RateLimiter(exec_rate)
+        self.show_progress = show_progress
+        self.all_containers = all_containers
+        self.images_without_shell = set()
+
+    def run(self, tasks, read, description='Read containers'):
+        """
+        :param tasks: list of (key, args) tuples, read(*args) is called once for each of them.
+        :return: dict of key to the result of read(). A read that raised gets None.
+        """
+        results = {}
+        progress = ProgressReporter(len(tasks), description, enabled=self.show_progress)
+
+        def safe_read(key, args):
+            try:
+                return read(*args)
+            except Exception as e:
+                print(f"Could not read {key}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(safe_read, key, args): key for key, args in tasks}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                progress.update()
+        return results
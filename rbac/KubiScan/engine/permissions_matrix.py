@@ -0,0 +1,152 @@
+from array import array
+
+# Namespace of the permissions granted by ClusterRoleBindings, and the resource name of rules without resourceNames.
+ALL = '*'
+
+ROW_SIZE = 6
+SUBJECT, NAMESPACE, VERB, API_GROUP, RESOURCE, RESOURCE_NAME = range(ROW_SIZE)
+
+
+def get_subject_key(kind, namespace, name):
+    return kind.lower(), namespace.lower() if namespace is not None else None, name.lower()
+
+
+class Permission:
+    def __init__(self, subject_kind, subject_namespace, subject_name, namespace, verb, api_group, resource, resource_name):
+        self.subject_kind = subject_kind
+        self.subject_namespace = subject_namespace
+        self.subject_name = subject_name
+        self.namespace = namespace
+        self.verb = verb
+        self.api_group = api_group
+        self.resource = resource
+        self.resource_name = resource_name
+
+
+class InternTable:
+    """Gives each distinct value a small int id, so the rows of the matrix are arrays of ints."""
+
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def intern(self, value):
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = len(self.values)
+            self.ids[value] = value_id
+            self.values.append(value)
+        return value_id
+
+    def get_id(self, value):
+        return self.ids.get(value)
+
+
+class PermissionsMatrix:
+    """
+    The effective permissions of every subject: the join of the bindings, their roles and their subjects
+    as (subject, namespace, verb, apiGroup, resource, resourceName) rows.
+
+    The values are interned and the rows are kept sorted and deduplicated in one flat array, so the
+    rows of a subject are a contiguous range. A (verb, resource) index gives the rows for
+    "who can <verb> <resource>" queries. '*' in the rules is kept as is and matched by the queries.
+    Only resource rules are included, nonResourceURLs are not.
+    Subjects are looked up case-insensitively, like the associated bindings queries.
+    """
+
+    def __init__(self, rolebindings, cluster_rolebindings, get_role):
+        # get_role(role_ref, namespace) returns the Role/ClusterRole of a roleRef or None.
+        self.subjects = InternTable()
+        self.strings = InternTable()
+        rows = set()
+        for binding_namespace, bindings in ((None, rolebindings), (ALL, cluster_rolebindings)):
+            for binding in bindings:
+                namespace = binding.metadata.namespace if binding_namespace is None else binding_namespace
+                if not binding.subjects or binding.role_ref is None:
+                    continue
+                role = get_role(binding.role_ref, binding.metadata.namespace)
+                if role is None or not role.rules:
+                    continue
+                rule_rows = self._get_rules_rows(namespace, role.rules)
+                for subject in binding.subjects:
+                    subject_id = self.subjects.intern((subject.kind, subject.namespace, subject.name))
+                    rows.update((subject_id,) + rule_row for rule_row in rule_rows)
+
+        self.subject_ids_by_key = {}
+        for subject_id, subject in enumerate(self.subjects.values):
+            self.subject_ids_by_key.setdefault(get_subject_key(*subject), []).append(subject_id)
+
+        self.rows = array('l')
+        self.subject_ranges = {}
+        self.verb_resource_index = {}
+        for row_number, row in enumerate(sorted(rows)):
+            self.rows.extend(row)
+            start, _ = self.subject_ranges.get(row[SUBJECT], (row_number, row_number))
+            self.subject_ranges[row[SUBJECT]] = (start, row_number + 1)
+            self.verb_resource_index.setdefault((row[VERB], row[RESOURCE]), array('l')).append(row_number)
+
+    def _get_rules_rows(self, namespace, rules):
+        intern = self.strings.intern
+        namespace_id = intern(namespace)
+        rule_rows = []
+        for rule in rules:
+            if not rule.resources or not rule.verbs:
+                continue
+            api_groups = [intern(api_group) for api_group in rule.api_groups or ['']]
+            resource_names = [intern(resource_name) for resource_name in rule.resource_names or [ALL]]
+            for verb in rule.verbs:
+                verb_id = intern(verb)
+                for api_group_id in api_groups:
+                    for resource in rule.resources:
+                        resource_id = intern(resource)
+                        for resource_name_id in resource_names:
+                            rule_rows.append((namespace_id, verb_id, api_group_id, resource_id, resource_name_id))
+        return rule_rows
+
+    def __len__(self):
+        return len(self.rows) // ROW_SIZE
+
+    def _get_row(self, row_number):
+        offset = row_number * ROW_SIZE
+        return self.rows[offset:offset + ROW_SIZE]
+
+    def _to_permission(self, row):
+        subject_kind, subject_namespace, subject_name = self.subjects.values[row[SUBJECT]]
+        values = self.strings.values
+        return Permission(subject_kind, subject_namespace, subject_name, values[row[NAMESPACE]], values[row[VERB]],
+                          values[row[API_GROUP]], values[row[RESOURCE]], values[row[RESOURCE_NAME]])
+
+    def _get_ids(self, value):
+        # The id of the value and of '*', which grants every value.
+        return {value_id for value_id in (self.strings.get_id(value), self.strings.get_id(ALL)) if value_id is not None}
+
+    def get_subject_permissions(self, kind, name, namespace=None):
+        permissions = []
+        # The subjects that differ only by case ('alice' and 'Alice') are all returned, in the rows order.
+        for subject_id in self.subject_ids_by_key.get(get_subject_key(kind, namespace, name), []):
+            if subject_id in self.subject_ranges:
+                start, end = self.subject_ranges[subject_id]
+                permissions.extend(self._to_permission(self._get_row(row_number)) for row_number in range(start, end))
+        return permissions
+
+    def who_can(self, verb, resource, namespace=None, api_group=None, resource_name=None):
+        """
+        :return: the permissions that grant 'verb' on 'resource', in 'namespace' if it is specified
+                 (cluster-wide permissions included). Permissions granted with '*' are included.
+        """
+        namespace_ids = self._get_ids(namespace) if namespace is not None else None
+        api_group_ids = self._get_ids(api_group) if api_group is not None else None
+        resource_name_ids = self._get_ids(resource_name) if resource_name is not None else None
+        row_numbers = []
+        for verb_id in self._get_ids(verb):
+            for resource_id in self._get_ids(resource):
+                for row_number in self.verb_resource_index.get((verb_id, resource_id), ()):
+                    row = self._get_row(row_number)
+                    if namespace_ids is not None and row[NAMESPACE] not in namespace_ids:
+                        continue
+                    if api_group_ids is not None and row[API_GROUP] not in api_group_ids:
+                        continue
+                    if resource_name_ids is not None and row[RESOURCE_NAME] not in resource_name_ids:
+                        continue
+                    row_numbers.append(row_number)
+        return [self._to_permission(self._get_row(row_number)) for row_number in sorted(row_numbers)]
@@ -1,6 +1,8 @@
 # TODO: add priority field which will have the highest priority from the containers
 class Pod:
-    def __init__(self, name, namespace, containers):
+    def __init__(self, name, namespace, containers, replicas=None):
         self.name = name
         self.namespace = namespace
         self.containers = containers
+        # Names of the pods with the same findings when the replicas are collapsed, 'name' is one of them.
+        self.replicas = replicas if replicas is not None else [name]
@@ -0,0 +1,180 @@
+import engine.capabilities.capabilities as caps
+
+PRIVILEGED = 'privileged'
+HOST_NAMESPACES = 'host_namespaces'
+HOST_PATH = 'host_path'
+SECRET_VOLUMES = 'secret_volumes'
+SECRET_ENV = 'secret_env'
+RISKY_SERVICE_ACCOUNT = 'risky_service_account'
+
+ALL_CHECKS = [PRIVILEGED, HOST_NAMESPACES, HOST_PATH, SECRET_VOLUMES, SECRET_ENV, RISKY_SERVICE_ACCOUNT]
+
+HOST_NAMESPACES_FIELDS = ['host_ipc', 'host_pid', 'host_network']
+
+# Controllers whose pods are replicas of a template, and the labels they set on the pods of
+# the same template revision. Other owners (a Node for the static pods) are not replica groups.
+REPLICA_CONTROLLER_KINDS = ['ReplicaSet', 'StatefulSet', 'DaemonSet']
+REPLICA_HASH_LABELS = ['pod-template-hash', 'controller-revision-hash']
+# Controllers with a template that can't be updated, all their pods are replicas of it.
+# A ReplicationController template can be updated and its pods have no revision label, they are not grouped.
+IMMUTABLE_TEMPLATE_CONTROLLER_KINDS = ['Job']
+
+
+def is_privileged(security_context, is_container=False):
+    is_privileged = False
+    if security_context:
+        # shared to pods and containers
+        if security_context.run_as_user == 0:
+            is_privileged = True
+        elif is_container:
+            if security_context.privileged:
+                is_privileged = True
+            elif security_context.allow_privilege_escalation:
+                is_privileged = True
+            elif security_context.capabilities:
+                if security_context.capabilities.add:
+                    for cap in security_context.capabilities.add:
+                        if cap in caps.dangerous_caps:
+                            is_privileged = True
+                            break
+    return is_privileged
+
+
+def get_replicas_key(pod):
+    """
+    :return: the key shared by the replicas of the pod, its controller and template hash,
+             or None if the pod is not a replica (no replica controller, or no template hash label
+             for the controllers with a mutable template).
+    """
+    controller = next((owner for owner in pod.metadata.owner_references or [] if owner.controller), None)
+    if controller is None:
+        return None
+    if controller.kind in IMMUTABLE_TEMPLATE_CONTROLLER_KINDS:
+        # The controller uid identifies the template.
+        return (pod.metadata.namespace, controller.kind, controller.name, controller.uid, ())
+    if controller.kind not in REPLICA_CONTROLLER_KINDS:
+        return None
+    labels = pod.metadata.labels or {}
+    template_hashes = tuple(labels.get(label) for label in REPLICA_HASH_LABELS)
+    if not any(template_hashes):
+        return None
+    return (pod.metadata.namespace, controller.kind, controller.name, controller.uid, template_hashes)
+
+
+def group_replicas(pods):
+    """
+    Groups the pods created by the same controller from the same template revision
+    (REPLICA_CONTROLLER_KINDS) or from the same immutable template (IMMUTABLE_TEMPLATE_CONTROLLER_KINDS). Their specs are the same apart from the names, so one of them
+    can be analyzed for all.
+
+    :return: list of pods lists, in the order of the first pod of each group.
+    """
+    groups = []
+    groups_by_key = {}
+    for pod in pods:
+        key = get_replicas_key(pod)
+        if key is None:
+            groups.append([pod])
+        elif key in groups_by_key:
+            groups_by_key[key].append(pod)
+        else:
+            groups_by_key[key] = [pod]
+            groups.append(groups_by_key[key])
+    return groups
+
+
+class ContainerFindings:
+    def __init__(self, container):
+        self.container = container
+        self.privileged = False
+        self.host_ports = []
+        # (volume_mount, volume) tuples, in the order of the container volume mounts.
+        self.host_path_mounts = []
+        self.secret_volume_mounts = []
+        # Environment variables with a secretKeyRef.
+        self.secret_env = []
+
+    @property
+    def is_privileged(self):
+        return self.privileged or bool(self.host_ports) or bool(self.host_path_mounts)
+
+
+class PodFindings:
+    def __init__(self, pod, replicas=None):
+        self.pod = pod
+        # The pods the findings apply to, 'pod' is the one that was analyzed.
+        self.replicas = replicas if replicas is not None else [pod]
+        # Names of the host_* fields set in the pod spec.
+        self.host_namespaces = []
+        self.privileged = False
+        self.containers = []
+        # engine.container.Container objects of the containers with a risky service account.
+        self.risky_containers = []
+
+    @property
+    def is_privileged(self):
+        return bool(self.host_namespaces) or self.privileged
+
+    def get_privileged_containers(self):
+        # A privileged pod makes all its containers privileged.
+        if self.is_privileged:
+            return list(self.pod.spec.containers)
+        return [container_findings.container for container_findings in self.containers if container_findings.is_privileged]
+
+
+class PodAnalyzer:
+    """
+    Computes the findings of the requested checks for a pod in a single visit of its spec.
+    The volumes are indexed by name once per pod and shared by the volume mounts of all its
+    containers. The risky service account check depends on the RBAC data, so it is done by
+    'get_risky_containers(pod)', given by the caller.
+    """
+
+    def __init__(self, checks=None, get_risky_containers=None):
+        self.checks = set(checks if checks is not None else ALL_CHECKS)
+        self.get_risky_containers = get_risky_containers
+
+    def analyze(self, pod, replicas=None):
+        checks = self.checks
+        spec = pod.spec
+        findings = PodFindings(pod, replicas)
+        # The privileged check includes the host namespaces, host ports and hostPath volumes.
+        check_privileged = PRIVILEGED in checks
+        check_host_path = check_privileged or HOST_PATH in checks
+        check_secret_volumes = SECRET_VOLUMES in checks
+
+        if check_privileged or HOST_NAMESPACES in checks:
+            findings.host_namespaces = [field for field in HOST_NAMESPACES_FIELDS if getattr(spec, field)]
+        if check_privileged:
+            findings.privileged = is_privileged(spec.security_context, is_container=False)
+
+        volumes = {volume.name: volume for volume in spec.volumes or []} if check_host_path or check_secret_volumes else {}
+        for container in spec.containers:
+            container_findings = ContainerFindings(container)
+            if check_privileged:
+                container_findings.privileged = is_privileged(container.security_context, is_container=True)
+                container_findings.host_ports = [port for port in container.ports or [] if port.host_port]
+            if volumes:
+                for volume_mount in container.volume_mounts or []:
+                    volume = volumes.get(volume_mount.name)
+                    if volume is None:
+                        continue
+                    if check_host_path and volume.host_path:
+                        container_findings.host_path_mounts.append((volume_mount, volume))
+                    if check_secret_volumes and volume.secret is not None:
+                        container_findings.secret_volume_mounts.append((volume_mount, volume))
+            if SECRET_ENV in checks:
+                container_findings.secret_env = [env for env in container.env or []
+                                                 if env.value_from is not None and env.value_from.secret_key_ref is not None]
+            findings.containers.append(container_findings)
+
+        if RISKY_SERVICE_ACCOUNT in checks and self.get_risky_containers is not None:
+            findings.risky_containers = self.get_risky_containers(pod)
+        return findings
+
+    def analyze_pods(self, pods):
+        return [self.analyze(pod) for pod in pods]
+
+    def analyze_replicas(self, pods_replicas):
+        # Analyzes the first pod of each group of replicas (see group_replicas()).
+        return [self.analyze(replicas[0], replicas) for replicas in pods_replicas]
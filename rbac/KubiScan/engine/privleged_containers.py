@@ -1,68 +1,31 @@
-import engine.capabilities.capabilities as caps
+import copy
 from api import api_client
-from api.config import get_api_client
+from api.config import get_snapshot
+from engine.pod_analyzer import PodAnalyzer, PRIVILEGED, group_replicas
 
 def list_pods_for_all_namespaces_or_one_namspace(namespace=None):
-    api_client=get_api_client()
-    if namespace is None:
-        pods = api_client.list_pod_for_all_namespaces(watch=False)
-    else:
-        pods = api_client.list_namespaced_pod(namespace)
-    return pods
+    return get_snapshot().get_pods(namespace)
 
 def list_pods(namespace=None):
     return list_pods_for_all_namespaces_or_one_namspace(namespace)
 
-def is_privileged(security_context, is_container=False):
-    is_privileged = False
-    if security_context:
-        # shared to pods and containers
-        if security_context.run_as_user == 0:
-            is_privileged = True
-        elif is_container:
-            if security_context.privileged:
-                is_privileged = True
-            elif security_context.allow_privilege_escalation:
-                is_privileged = True
-            elif security_context.capabilities:
-                if security_context.capabilities.add:
-                    for cap in security_context.capabilities.add:
-                        if cap in caps.dangerous_caps:
-                            is_privileged = True
-                            break
-    return is_privileged
-
-def get_privileged_containers(namespace=None):
+def get_privileged_containers(namespace=None, pods_findings=None, collapse_replicas=False):
+    """
+    :param pods_findings: PodFindings of a PodAnalyzer run with the PRIVILEGED check. The pods are analyzed here when it is not given.
+    :param collapse_replicas: analyze and return a single pod for each group of replicas (see pod_analyzer.group_replicas()).
+    """
+    if pods_findings is None:
+        pods = list_pods_for_all_namespaces_or_one_namspace(namespace)
+        pods_replicas = group_replicas(pods) if collapse_replicas else [[pod] for pod in pods]
+        pods_findings = PodAnalyzer([PRIVILEGED]).analyze_replicas(pods_replicas)
     privileged_pods = []
-    pods = list_pods_for_all_namespaces_or_one_namspace(namespace)
-    for pod in pods.items:
-        privileged_containers = []
-        if pod.spec.host_ipc or pod.spec.host_pid or pod.spec.host_network or is_privileged(pod.spec.security_context, is_container=False):
-            privileged_containers = pod.spec.containers
-        else:
-            for container in pod.spec.containers:
-                found_privileged_container = False
-                if is_privileged(container.security_context, is_container=True):
-                    privileged_containers.append(container)
-                elif container.ports:
-                    for ports in container.ports:
-                        if ports.host_port:
-                            privileged_containers.append(container)
-                            found_privileged_container = True
-                            break
-                if not found_privileged_container:
-                    if pod.spec.volumes is not None:
-                      for volume in pod.spec.volumes:
-                          if found_privileged_container:
-                              break
-                          if volume.host_path:
-                              for volume_mount in container.volume_mounts:
-                                   if volume_mount.name == volume.name:
-                                       privileged_containers.append(container)
-                                       found_privileged_container = True
-                                       break
+    for pod_findings in pods_findings:
+        privileged_containers = pod_findings.get_privileged_containers()
         if privileged_containers:
-            pod.spec.containers = privileged_containers
-            privileged_pods.append(pod)
+            # The pod is shared through the snapshot, keep only the privileged containers on a copy.
+            privileged_pod = copy.copy(pod_findings.pod)
+            privileged_pod.spec = copy.copy(pod_findings.pod.spec)
+            privileged_pod.spec.containers = privileged_containers
+            privileged_pods.append(privileged_pod)
 
     return privileged_pods
@@ -0,0 +1,90 @@
+class CompiledRiskyRule:
+    __slots__ = ('template_index', 'verbs', 'resources', 'rule')
+
+    def __init__(self, template_index, rule):
+        self.template_index = template_index
+        self.verbs = frozenset(rule.verbs or [])
+        self.resources = frozenset(rule.resources or [])
+        self.rule = rule
+
+
+class RiskyRolesIndex:
+    """
+    The risky roles templates (STATIC_RISKY_ROLES) compiled for matching.
+
+    Each template rule is stored under one (verb, resource) pair it requires, so a role rule
+    only visits the template rules whose pair it grants and checks them with set operations.
+    A role matches a template like in are_rules_contain_other_rules(): when the number of
+    (template rule, role rule) containments reaches the number of template rules.
+    The first matching template in file order wins.
+    """
+
+    def __init__(self, risky_roles, rule_check):
+        # rule_check(source_role_name, source_rule, risky_rule) is used for the template rules
+        # with resource names, which can't be decided from the verbs and resources only.
+        self.rule_check = rule_check
+        self.templates = []
+        self.required_matches = []
+        self.anchored_rules = {}
+        self.unanchored_rules = []
+        self.checked_rules = []
+
+        seen_rules = set()
+        for risky_role in risky_roles:
+            # Templates with several rules are listed once per rule, all sharing the same rules list.
+            if not risky_role.rules or id(risky_role.rules) in seen_rules:
+                continue
+            seen_rules.add(id(risky_role.rules))
+            template_index = len(self.templates)
+            self.templates.append(risky_role)
+            self.required_matches.append(len(risky_role.rules))
+            for rule in risky_role.rules:
+                compiled_rule = CompiledRiskyRule(template_index, rule)
+                if rule.resource_names is not None:
+                    self.checked_rules.append(compiled_rule)
+                elif compiled_rule.verbs and compiled_rule.resources:
+                    anchor = (rule.verbs[0], rule.resources[0])
+                    self.anchored_rules.setdefault(anchor, []).append(compiled_rule)
+                else:
+                    self.unanchored_rules.append(compiled_rule)
+
+    @property
+    def matches_by_rules_only(self):
+        # The resource names checks also depend on the role name and on the cluster roles.
+        return not self.checked_rules
+
+    def _candidate_rules(self, verbs, resources):
+        if len(verbs) * len(resources) <= len(self.anchored_rules):
+            for verb in verbs:
+                for resource in resources:
+                    yield from self.anchored_rules.get((verb, resource), ())
+        else:
+            for (verb, resource), compiled_rules in self.anchored_rules.items():
+                if verb in verbs and resource in resources:
+                    yield from compiled_rules
+        yield from self.unanchored_rules
+
+    def get_matching_risky_role(self, source_role_name, source_rules):
+        """
+        :return: the first risky role template whose rules are all contained in 'source_rules', or None.
+        """
+        if not source_rules:
+            return None
+
+        matches = [0] * len(self.templates)
+        for source_rule in source_rules:
+            if source_rule.resources is None:
+                continue
+            verbs = frozenset(source_rule.verbs or [])
+            resources = frozenset(source_rule.resources)
+            for compiled_rule in self._candidate_rules(verbs, resources):
+                if compiled_rule.verbs <= verbs and compiled_rule.resources <= resources:
+                    matches[compiled_rule.template_index] += 1
+            for compiled_rule in self.checked_rules:
+                if self.rule_check(source_role_name, source_rule, compiled_rule.rule):
+                    matches[compiled_rule.template_index] += 1
+
+        for template_index, matched_rules in enumerate(matches):
+            if matched_rules >= self.required_matches[template_index]:
+                return self.templates[template_index]
+        return None
@@ -0,0 +1,72 @@
+import hashlib
+import json
+import os
+
+from engine.priority import get_priority_by_name
+
+
+def _canonical_rule(rule):
+    # Only the fields read by the risky roles matching. The verbs and resources are matched as sets.
+    return [sorted(set(rule.verbs or [])),
+            sorted(set(rule.resources)) if rule.resources is not None else None,
+            sorted(set(rule.resource_names)) if rule.resource_names is not None else None]
+
+
+def get_rules_fingerprint(rules):
+    """
+    Content hash of a rules list. The rules order does not matter but repeated rules do,
+    because every (risky rule, rule) containment is counted.
+    """
+    canonical_rules = sorted((_canonical_rule(rule) for rule in rules or []), key=json.dumps)
+    return hashlib.sha256(json.dumps(canonical_rules).encode()).hexdigest()
+
+
+def get_risky_roles_fingerprint(risky_roles):
+    canonical_roles = [[risky_role.name, risky_role.priority.name, [_canonical_rule(rule) for rule in risky_role.rules]]
+                       for risky_role in risky_roles]
+    return hashlib.sha256(json.dumps(canonical_roles).encode()).hexdigest()
+
+
+class RoleRiskCache:
+    """
+    (is_risky, priority) of the rules lists already classified, keyed by get_rules_fingerprint().
+    Roles with identical rules (the same chart installed in many namespaces) are classified once.
+
+    The cache can be saved to a file and loaded by the next run. A saved cache is only used
+    if it was built with the same risky roles templates.
+    """
+
+    def __init__(self, risky_roles_fingerprint):
+        self.risky_roles_fingerprint = risky_roles_fingerprint
+        self.results = {}
+
+    def get(self, fingerprint):
+        return self.results.get(fingerprint)
+
+    def set(self, fingerprint, is_risky, priority):
+        self.results[fingerprint] = (is_risky, priority)
+
+    def load(self, path):
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r') as file:
+                data = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"Could not read the risk cache file {path}: {e}")
+            return
+        if data.get('risky_roles') != self.risky_roles_fingerprint:
+            return
+        for fingerprint, (is_risky, priority_name) in data.get('results', {}).items():
+            self.results.setdefault(fingerprint, (is_risky, get_priority_by_name(priority_name)))
+
+    def save(self, path):
+        data = {
+            'risky_roles': self.risky_roles_fingerprint,
+            'results': {fingerprint: [is_risky, priority.name] for fingerprint, (is_risky, priority) in self.results.items()}
+        }
+        try:
+            with open(path, 'w') as file:
+                json.dump(data, file)
+        except OSError as e:
+            print(f"Could not write the risk cache file {path}: {e}")
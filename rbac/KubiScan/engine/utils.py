@@ -3,37 +3,76 @@ import requests
 from engine.role import Role
 from engine.priority import Priority
 from static_risky_roles import STATIC_RISKY_ROLES
+from engine.risky_roles_index import RiskyRolesIndex
+from engine.permissions_matrix import PermissionsMatrix
+from engine.role_risk_cache import RoleRiskCache, get_rules_fingerprint, get_risky_roles_fingerprint
+from engine.deep_scan import DeepScanner, GROUP_READ_ATTEMPTS
+from engine.pod_analyzer import PodAnalyzer, ALL_CHECKS, PRIVILEGED, RISKY_SERVICE_ACCOUNT, group_replicas
 from engine.role_binding import RoleBinding
 from kubernetes.stream import stream
+from kubernetes.stream.ws_client import STDOUT_CHANNEL, ERROR_CHANNEL
 from engine.pod import Pod
 from engine.container import Container
+import copy
 import json
 from api import api_client
 from engine.subject import Subject
 from misc.constants import *
+from kubernetes.client import V1Subject
 from kubernetes.client.rest import ApiException
 import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-from api.config import Config
+from api.config import Config, get_snapshot
+from api.cluster_snapshot import RBAC_COLLECTIONS, PODS, ROLES, CLUSTER_ROLES, ROLE_BINDINGS, SERVICE_ACCOUNT_TOKEN_SECRETS, SERVICE_ACCOUNTS, WORKLOADS
+from api.base_client_api import WORKLOAD_KINDS
+from concurrent.futures import ThreadPoolExecutor
 
 # region - Roles and ClusteRoles
 
-list_of_service_accounts = []
 def is_risky_resource_name_exist(source_rolename, source_resourcenames):
     is_risky = False
-    for resource_name in source_resourcenames:
+    for resource_name in source_resourcenames or []:
         # prevent cycles.
         if resource_name != source_rolename:
             # TODO: Need to allow this check also for 'roles' resource_name, should consider namespace...
-            role = get_role_by_name_and_kind(resource_name, CLUSTER_ROLE_KIND)
-            if role is not None:
-                is_risky, priority = is_risky_role(role)
-                if is_risky:
-                    break
+            if is_risky_clusterrole_name(resource_name):
+                is_risky = True
+                break
 
     return is_risky
 
 
+def is_risky_clusterrole_name(name):
+    return name in get_risky_clusterrole_names()
+
+
+def get_risky_clusterrole_names():
+    """
+    Names of the risky ClusterRoles, used by the risky rules with resourceNames: a role that can
+    bind a risky ClusterRole is risky too. The shipped templates have no resourceNames
+    (static_risky_roles.py does not read them), so this is only reached with custom templates.
+
+    Computed once per snapshot as a least fixpoint: the ClusterRoles are checked again until no
+    new risky role is found, each check seeing the roles found so far. A chain of bindings is
+    followed whatever the order of the roles, and a role on a cycle (A binds B, B binds A) is
+    risky only if a role of the cycle is risky by itself or binds a risky role.
+    """
+    state = get_snapshot().get_derived('risky_clusterrole_names', dict)
+    if not state:
+        # The checks below call this function again and get the roles found so far.
+        risky_names = state['names'] = set()
+        cluster_roles = get_snapshot().cluster_roles
+        found = True
+        while found:
+            found = False
+            for role in cluster_roles:
+                name = role.metadata.name
+                if name not in risky_names and RISKY_ROLES_INDEX.get_matching_risky_role(name, role.rules) is not None:
+                    risky_names.add(name)
+                    found = True
+    return state['names']
+
+
 def is_rule_contains_risky_rule(source_role_name, source_rule, risky_rule):
     is_contains = True
     is_bind_verb_found = False
@@ -106,13 +145,9 @@ def get_current_version(certificate_authority_file=None, client_certificate_file
 
 
 def get_role_by_name_and_kind(name, kind, namespace=None):
-    requested_role = None
-    roles = get_roles_by_kind(kind)
-    for role in roles.items:
-        if role.metadata.name == name:
-            requested_role = role
-            break
-    return requested_role
+    if kind == ROLE_KIND:
+        return get_snapshot().get_role(name)
+    return get_snapshot().get_cluster_role(name)
 
 
 def are_rules_contain_other_rules(source_role_name, source_rules, target_rules):
@@ -132,18 +167,38 @@ def are_rules_contain_other_rules(source_role_name, source_rules, target_rules):
     return is_contains
 
 
+RISKY_ROLES_INDEX = RiskyRolesIndex(STATIC_RISKY_ROLES, is_rule_contains_risky_rule)
+ROLE_RISK_CACHE = RoleRiskCache(get_risky_roles_fingerprint(STATIC_RISKY_ROLES))
+
+
 def is_risky_role(role):
+    fingerprint = None
+    if RISKY_ROLES_INDEX.matches_by_rules_only:
+        fingerprint = get_rules_fingerprint(role.rules)
+        cached_result = ROLE_RISK_CACHE.get(fingerprint)
+        if cached_result is not None:
+            return cached_result
+
     is_risky = False
     priority = Priority.LOW
-    for risky_role in STATIC_RISKY_ROLES:
-        if are_rules_contain_other_rules(role.metadata.name, role.rules, risky_role.rules):
-            is_risky = True
-            priority = risky_role.priority
-            break
+    risky_role = RISKY_ROLES_INDEX.get_matching_risky_role(role.metadata.name, role.rules)
+    if risky_role is not None:
+        is_risky = True
+        priority = risky_role.priority
 
+    if fingerprint is not None:
+        ROLE_RISK_CACHE.set(fingerprint, is_risky, priority)
     return is_risky, priority
 
 
+def load_role_risk_cache(path):
+    ROLE_RISK_CACHE.load(path)
+
+
+def save_role_risk_cache(path):
+    ROLE_RISK_CACHE.save(path)
+
+
 def find_risky_roles(roles, kind):
     risky_roles = []
     for role in roles:
@@ -160,11 +215,11 @@ def get_roles_by_kind(kind):
     all_roles = []
     if kind == ROLE_KIND:
         #all_roles = api_client.RbacAuthorizationV1Api.list_role_for_all_namespaces()
-        all_roles = Config.api_client.list_roles_for_all_namespaces()
+        all_roles = get_snapshot().roles
     else:
         #all_roles = api_client.RbacAuthorizationV1Api.list_cluster_role()
         #all_roles = api_client.api_temp.list_cluster_role() 
-        all_roles = Config.api_client.list_cluster_role()
+        all_roles = get_snapshot().cluster_roles
     return all_roles
 
 
@@ -174,7 +229,7 @@ def get_risky_role_by_kind(kind):
     all_roles = get_roles_by_kind(kind)
 
     if all_roles is not None:
-        risky_roles = find_risky_roles(all_roles.items, kind)
+        risky_roles = find_risky_roles(all_roles, kind)
 
     return risky_roles
 
@@ -200,24 +255,35 @@ def get_risky_clusterroles():
 
 # region - RoleBindings and ClusterRoleBindings
 
-def is_risky_rolebinding(risky_roles, rolebinding):
-    is_risky = False
-    priority = Priority.LOW
+def get_role_key(kind, namespace, name):
+    # Roles are looked up in their namespace, ClusterRoles only by name.
+    return kind, namespace if kind == ROLE_KIND else None, name
+
+
+def index_risky_roles(risky_roles):
+    risky_roles_index = {}
     for risky_role in risky_roles:
+        risky_roles_index.setdefault(get_role_key(risky_role.kind, risky_role.namespace, risky_role.name), risky_role)
+    return risky_roles_index
 
-        # It is also possible to add check for role kind
-        if rolebinding.role_ref.name == risky_role.name:
-            is_risky = True
-            priority = risky_role.priority
-            break
+
+def is_risky_rolebinding(risky_roles_index, rolebinding):
+    is_risky = False
+    priority = Priority.LOW
+    role_ref = rolebinding.role_ref
+    risky_role = risky_roles_index.get(get_role_key(role_ref.kind, rolebinding.metadata.namespace, role_ref.name))
+    if risky_role is not None:
+        is_risky = True
+        priority = risky_role.priority
 
     return is_risky, priority
 
 
 def find_risky_rolebindings_or_clusterrolebindings(risky_roles, rolebindings, kind):
     risky_rolebindings = []
+    risky_roles_index = index_risky_roles(risky_roles)
     for rolebinding in rolebindings:
-        is_risky, priority = is_risky_rolebinding(risky_roles, rolebinding)
+        is_risky, priority = is_risky_rolebinding(risky_roles_index, rolebinding)
         if is_risky:
             risky_rolebindings.append(RoleBinding(rolebinding.metadata.name,
                                                   priority,
@@ -230,7 +296,7 @@ def find_risky_rolebindings_or_clusterrolebindings(risky_roles, rolebindings, ki
 def get_rolebinding_by_kind_all_namespaces(kind):
     all_roles = []
     if kind == ROLE_BINDING_KIND:
-        all_roles = Config.api_client.list_role_binding_for_all_namespaces()
+        all_roles = get_snapshot().role_bindings
     # else:
     # TODO: check if it was fixed
     # all_roles = api_client.RbacAuthorizationV1Api.list_cluster_role_binding()
@@ -239,6 +305,7 @@ def get_rolebinding_by_kind_all_namespaces(kind):
 
 
 def get_all_risky_rolebinding():
+    get_snapshot().prefetch(RBAC_COLLECTIONS)
     all_risky_roles = get_risky_roles_and_clusterroles()
 
     risky_rolebindings = get_risky_rolebindings(all_risky_roles)
@@ -252,7 +319,7 @@ def get_risky_rolebindings(all_risky_roles=None):
     if all_risky_roles is None:
         all_risky_roles = get_risky_roles_and_clusterroles()
     all_rolebindings = get_rolebinding_by_kind_all_namespaces(ROLE_BINDING_KIND)
-    risky_rolebindings = find_risky_rolebindings_or_clusterrolebindings(all_risky_roles, all_rolebindings.items,
+    risky_rolebindings = find_risky_rolebindings_or_clusterrolebindings(all_risky_roles, all_rolebindings,
                                                                         "RoleBinding")
 
     return risky_rolebindings
@@ -264,7 +331,7 @@ def get_risky_clusterrolebindings(all_risky_roles=None):
     # Cluster doesn't work.
     # https://github.com/kubernetes-client/python/issues/577 - when it will be solve, can remove the comments
     # all_clusterrolebindings = api_client.RbacAuthorizationV1Api.list_cluster_role_binding()
-    all_clusterrolebindings = Config.api_client.list_cluster_role_binding()
+    all_clusterrolebindings = get_snapshot().cluster_role_bindings
     # risky_clusterrolebindings = find_risky_rolebindings(all_risky_roles, all_clusterrolebindings.items, "ClusterRoleBinding")
     risky_clusterrolebindings = find_risky_rolebindings_or_clusterrolebindings(all_risky_roles, all_clusterrolebindings,
                                                                                "ClusterRoleBinding")
@@ -275,7 +342,7 @@ def get_risky_clusterrolebindings(all_risky_roles=None):
 
 # region- Risky Users
 
-def get_all_risky_subjects():
+def get_all_risky_subjects(expand_groups=False):
     all_risky_users = []
     all_risky_rolebindings = get_all_risky_rolebinding()
     passed_users = {}
@@ -287,12 +354,55 @@ def get_all_risky_subjects():
             if ''.join((user.kind, user.name, str(user.namespace))) not in passed_users:
                 passed_users[''.join((user.kind, user.name, str(user.namespace)))] = True
                 if user.namespace == None and (user.kind).lower() == "serviceaccount":
+                    # The subject belongs to the snapshot binding, fill the namespace on a copy.
+                    user = copy.copy(user)
                     user.namespace = risky_rolebinding.namespace
                 all_risky_users.append(Subject(user, risky_rolebinding.priority))
 
+    if expand_groups:
+        all_risky_users = expand_group_subjects(all_risky_users)
     return all_risky_users
 
 
+def get_group_service_accounts(group_name):
+    # system:serviceaccounts and system:authenticated have all the service accounts,
+    # system:serviceaccounts:<namespace> the service accounts of the namespace.
+    if group_name in (SERVICEACCOUNTS_GROUP, AUTHENTICATED_GROUP):
+        return [service_account for service_accounts in get_snapshot().get_service_accounts_by_namespace().values()
+                for service_account in service_accounts]
+    if group_name.startswith(SERVICEACCOUNTS_GROUP + ':'):
+        return get_snapshot().get_service_accounts_by_namespace().get(group_name[len(SERVICEACCOUNTS_GROUP) + 1:], [])
+    return []
+
+
+def expand_group_subjects(risky_subjects):
+    """
+    Adds the service accounts that are members of the built-in groups found in 'risky_subjects'.
+    A service account gets the highest priority of its own bindings and of its groups.
+    """
+    expanded_subjects = list(risky_subjects)
+    service_accounts_positions = {}
+    for position, risky_subject in enumerate(risky_subjects):
+        if risky_subject.user_info.kind == SERVICEACCOUNT_KIND:
+            service_accounts_positions.setdefault((risky_subject.user_info.namespace, risky_subject.user_info.name), position)
+
+    for risky_subject in risky_subjects:
+        if risky_subject.user_info.kind != GROUP_KIND:
+            continue
+        for service_account in get_group_service_accounts(risky_subject.user_info.name):
+            key = (service_account.metadata.namespace, service_account.metadata.name)
+            position = service_accounts_positions.get(key)
+            if position is None:
+                service_accounts_positions[key] = len(expanded_subjects)
+                expanded_subjects.append(Subject(V1Subject(kind=SERVICEACCOUNT_KIND, name=service_account.metadata.name,
+                                                           namespace=service_account.metadata.namespace),
+                                                 risky_subject.priority))
+            elif expanded_subjects[position].priority.value < risky_subject.priority.value:
+                expanded_subjects[position] = Subject(expanded_subjects[position].user_info, risky_subject.priority)
+
+    return expanded_subjects
+
+
 # endregion - Risky Users
 
 # region- Risky Pods
@@ -310,33 +420,77 @@ Example of JWT token decoded:
 '''
 
 
-def pod_exec_read_token(pod, container_name, path):
-    cat_command = 'cat ' + path
-    exec_command = ['/bin/sh',
-                    '-c',
-                    cat_command]
-    resp = ''
+DEEP_SCANNER = DeepScanner()
+
+
+def set_deep_scan_options(max_workers, exec_timeout, exec_rate, show_progress=True, all_containers=False):
+    global DEEP_SCANNER
+    DEEP_SCANNER = DeepScanner(max_workers, exec_timeout, exec_rate, show_progress, all_containers)
+
+
+def get_pod_container(pod, container_name):
+    return next((container for container in pod.spec.containers if container.name == container_name), None)
+
+
+def get_read_service_account_files_command():
+    # Prints the files of the first service account directory with a token, each one followed by a separator line.
+    read_files = ' '.join('cat "$d/{0}" 2>/dev/null; echo; echo {1};'.format(file_name, SERVICE_ACCOUNT_FILES_SEPARATOR)
+                          for file_name in SERVICE_ACCOUNT_FILES)
+    return ['/bin/sh',
+            '-c',
+            'for d in {0}; do if [ -s "$d/token" ]; then {1} exit 0; fi; done'.format(' '.join(SERVICE_ACCOUNT_TOKEN_DIRS), read_files)]
+
+
+def is_missing_shell_error(error):
+    try:
+        status = json.loads(error)
+    except ValueError:
+        return False
+    message = status.get('message', '') if isinstance(status, dict) else ''
+    return status.get('status') == 'Failure' and ('executable file not found' in message or 'no such file or directory' in message)
+
+
+def pod_exec_read_service_account_files(pod, container_name):
+    """
+    Reads the token, ca.crt and namespace files of the service account in one exec.
+    Containers of an image already found without /bin/sh are not executed again.
+
+    :return: dict of file name to its content, empty if the container could not be read.
+    """
+    container = get_pod_container(pod, container_name)
+    image = container.image if container is not None else None
+    if image is not None and image in DEEP_SCANNER.images_without_shell:
+        return {}
+
+    DEEP_SCANNER.rate_limiter.acquire()
     try:
-        resp = stream(api_client.CoreV1Api.connect_post_namespaced_pod_exec, pod.metadata.name, pod.metadata.namespace,
-                      command=exec_command, container=container_name,
-                      stderr=False, stdin=False,
-                      stdout=True, tty=False)
+        # The exec API runs a single command per connection, so the websocket can't be reused
+        # for another container. The connection is read directly to get the exec status too.
+        client = stream(api_client.CoreV1Api.connect_post_namespaced_pod_exec, pod.metadata.name, pod.metadata.namespace,
+                        command=get_read_service_account_files_command(), container=container_name,
+                        stderr=False, stdin=False,
+                        stdout=True, tty=False, _preload_content=False, _request_timeout=DEEP_SCANNER.exec_timeout)
     except ApiException as e:
         print("Exception when calling api_client.CoreV1Api->connect_post_namespaced_pod_exec: %s\n" % e)
         print('{0}, {1}'.format(pod.metadata.name, pod.metadata.namespace))
+        return {}
+    try:
+        client.run_forever(timeout=DEEP_SCANNER.exec_timeout)
+        output = client.read_channel(STDOUT_CHANNEL)
+        error = client.read_channel(ERROR_CHANNEL)
+    finally:
+        client.close()
 
-    return resp
-
-
-def pod_exec_read_token_two_paths(pod, container_name):
-    result = pod_exec_read_token(pod, container_name, '/run/secrets/kubernetes.io/serviceaccount/token')
-    if result == '':
-        result = pod_exec_read_token(pod, container_name, '/var/run/secrets/kubernetes.io/serviceaccount/token')
-    return result
+    if not output:
+        if error and is_missing_shell_error(error) and image is not None:
+            DEEP_SCANNER.images_without_shell.add(image)
+        return {}
+    contents = output.split('\n' + SERVICE_ACCOUNT_FILES_SEPARATOR + '\n')
+    return {file_name: content.strip() for file_name, content in zip(SERVICE_ACCOUNT_FILES, contents)}
 
 
 def get_jwt_token_from_container(pod, container_name):
-    resp = pod_exec_read_token_two_paths(pod, container_name)
+    resp = pod_exec_read_service_account_files(pod, container_name).get('token', '')
 
     token_body = ''
     if resp != '' and not resp.startswith('OCI'):
@@ -351,6 +505,35 @@ def get_jwt_token_from_container(pod, container_name):
     return token_body, resp
 
 
+class RiskyUsersIndex:
+    """
+    The risky subjects keyed by (namespace, name), built once per scan for the pods matching.
+    Like the list scans it replaces, the first subject with a key wins.
+    """
+
+    def __init__(self, risky_users):
+        self.risky_users = risky_users
+        self.by_namespace_and_name = {}
+        self.service_accounts = {}
+        for risky_user in risky_users:
+            key = (risky_user.user_info.namespace, risky_user.user_info.name)
+            self.by_namespace_and_name.setdefault(key, risky_user)
+            if risky_user.user_info.kind == SERVICEACCOUNT_KIND:
+                self.service_accounts.setdefault(key, risky_user)
+
+    def get(self, namespace, name):
+        return self.by_namespace_and_name.get((namespace, name))
+
+    def get_service_account(self, namespace, name):
+        return self.service_accounts.get((namespace, name))
+
+
+def get_risky_users_index(risky_users):
+    if isinstance(risky_users, RiskyUsersIndex):
+        return risky_users
+    return RiskyUsersIndex(risky_users)
+
+
 def is_same_user(a_username, a_namespace, b_username, b_namespace):
     return (a_username == b_username and a_namespace == b_namespace)
 
@@ -372,40 +555,146 @@ def get_risky_user_from_container(jwt_body, risky_users):
         service_account_namespace = jwt_body.get('kubernetes.io/serviceaccount/namespace')
 
     if service_account_name and service_account_namespace:
-        for risky_user in risky_users:
-            if risky_user.user_info.kind == 'ServiceAccount':
-                if is_same_user(service_account_name,
-                                service_account_namespace,
-                                risky_user.user_info.name, 
-                                risky_user.user_info.namespace):
-                    risky_user_in_container = risky_user
-                    break
+        risky_user_in_container = get_risky_users_index(risky_users).get_service_account(service_account_namespace,
+                                                                                         service_account_name)
 
     return risky_user_in_container
 
 
 
-def get_risky_containers(pod, risky_users, read_token_from_container=False):
+def get_running_containers_names(pod):
+    # Skipping terminated and evicted pods
+    # This will run only on the containers with the "ready" status
+    return [container.name for container in pod.status.container_statuses or []
+            if container.ready and container.state and container.state.running]
+
+
+def get_container_token_config(pod, container_name):
+    """
+    :return: how the service account token is mounted in the container: the secret volume
+             or the projected token sources mounted on the service account directory.
+    """
+    container = get_pod_container(pod, container_name)
+    if container is None:
+        return None
+    volumes = {volume.name: volume for volume in pod.spec.volumes or []}
+    token_config = []
+    for volume_mount in container.volume_mounts or []:
+        if volume_mount.mount_path.rstrip('/') not in SERVICE_ACCOUNT_TOKEN_DIRS:
+            continue
+        volume = volumes.get(volume_mount.name)
+        if volume is None:
+            continue
+        if volume.secret:
+            token_config.append(('secret', volume.secret.secret_name))
+        elif volume.projected:
+            for source in volume.projected.sources or []:
+                if source.service_account_token:
+                    token = source.service_account_token
+                    token_config.append(('projected', token.audience, token.expiration_seconds, token.path))
+    return tuple(token_config)
+
+
+def mounts_service_account_token(container):
+    # The exec only reads the service account directories, a token can only be found if a volume
+    # is mounted on one of them or on one of their parents.
+    for volume_mount in container.volume_mounts or []:
+        mount_path = volume_mount.mount_path.rstrip('/') + '/'
+        if any((token_dir + '/').startswith(mount_path) for token_dir in SERVICE_ACCOUNT_TOKEN_DIRS):
+            return True
+    return False
+
+
+def get_deep_scan_group_key(pod, container_name):
+    # Containers with the same key get a token of the same service account.
+    token_config = get_container_token_config(pod, container_name)
+    if not token_config:
+        return pod.metadata.namespace, pod.metadata.name, container_name
+    return pod.metadata.namespace, pod.spec.service_account_name or pod.spec.service_account or 'default', token_config
+
+
+def is_image_without_shell(pod, container_name):
+    container = get_pod_container(pod, container_name)
+    return container is not None and container.image in DEEP_SCANNER.images_without_shell
+
+
+def read_group_token(members):
+    # The first member that returns a token answers for the group. The next ones are only
+    # tried when a container can't be read, at most GROUP_READ_ATTEMPTS execs per group.
+    # The containers of an image found without a shell are skipped, they are not executed.
+    attempts = 0
+    for pod, container_name in members:
+        if is_image_without_shell(pod, container_name):
+            continue
+        attempts += 1
+        try:
+            jwt_body, raw_jwt_token = get_jwt_token_from_container(pod, container_name)
+        except Exception as e:
+            print(f"Could not read the token of {pod.metadata.namespace}/{pod.metadata.name}/{container_name}: {e}")
+            jwt_body, raw_jwt_token = '', ''
+        if jwt_body:
+            return jwt_body, raw_jwt_token
+        if attempts == GROUP_READ_ATTEMPTS:
+            break
+    return '', ''
+
+
+def read_running_containers_tokens(pods, all_containers=False):
+    """
+    Reads the tokens of the running containers of 'pods' with the DEEP_SCANNER worker pool.
+    Unless 'all_containers' or DEEP_SCANNER.all_containers is set, the containers are grouped by
+    get_deep_scan_group_key() and a single exec per group is made, its token is used for every
+    container of the group. The containers that mount no service account token are not executed.
+
+    :return: dict of (namespace, pod name, container name) to (jwt_body, raw_jwt_token).
+    """
+    groups = {}
+    skipped_containers = []
+    for pod in pods:
+        for container_name in get_running_containers_names(pod):
+            container = get_pod_container(pod, container_name)
+            if container is not None and not mounts_service_account_token(container):
+                # No token to read (automountServiceAccountToken disabled), the container is not executed.
+                skipped_containers.append((pod, container_name))
+                continue
+            if all_containers or DEEP_SCANNER.all_containers:
+                group_key = (pod.metadata.namespace, pod.metadata.name, container_name)
+            else:
+                group_key = get_deep_scan_group_key(pod, container_name)
+            groups.setdefault(group_key, []).append((pod, container_name))
+
+    tasks = [(group_key, (members,)) for group_key, members in groups.items()]
+    groups_tokens = DEEP_SCANNER.run(tasks, read_group_token, 'Read containers tokens')
+    tokens = {}
+    for group_key, members in groups.items():
+        token = groups_tokens.get(group_key) or ('', '')
+        for pod, container_name in members:
+            tokens[(pod.metadata.namespace, pod.metadata.name, container_name)] = token
+    for pod, container_name in skipped_containers:
+        tokens[(pod.metadata.namespace, pod.metadata.name, container_name)] = ('', '')
+    return tokens
+
+
+def get_risky_containers(pod, risky_users, read_token_from_container=False, containers_tokens=None):
     risky_containers = []
+    risky_users = get_risky_users_index(risky_users)
     if read_token_from_container:
-        # Skipping terminated and evicted pods
-        # This will run only on the containers with the "ready" status
-        if pod.status.container_statuses:
-            for container in pod.status.container_statuses:
-                if container.ready and container.state.running:
-                    jwt_body, _ = get_jwt_token_from_container(pod, container.name)
-                    if jwt_body:
-                        risky_user = get_risky_user_from_container(jwt_body, risky_users)
-                        if risky_user:
-                           risky_containers.append(
-                                Container(
-                                    container.name, 
-                                    risky_user.user_info.name,
-                                    risky_user.user_info.namespace,  
-                                    set() if risky_user is None else {risky_user}, 
-                                    risky_user.priority
-                                )
-                            )
+        if containers_tokens is None:
+            containers_tokens = read_running_containers_tokens([pod])
+        for container_name in get_running_containers_names(pod):
+            jwt_body, _ = containers_tokens[(pod.metadata.namespace, pod.metadata.name, container_name)]
+            if jwt_body:
+                risky_user = get_risky_user_from_container(jwt_body, risky_users)
+                if risky_user:
+                    risky_containers.append(
+                        Container(
+                            container_name,
+                            risky_user.user_info.name,
+                            risky_user.user_info.namespace,
+                            set() if risky_user is None else {risky_user},
+                            risky_user.priority
+                        )
+                    )
 
     else:
         # A dictionary for the volume
@@ -469,103 +758,242 @@ def default_path_exists(volume_mounts):
 
 
 def is_user_risky(risky_users, service_account, namespace):
-    for risky_user in risky_users:
-        if risky_user.user_info.name == service_account and risky_user.user_info.namespace == namespace:
-            return risky_user
-    return None
+    return get_risky_users_index(risky_users).get(namespace, service_account)
 
 
-def get_jwt_and_decode(pod, risky_users, volume):
+def get_secret_token_body(secret):
+    # Each token is decoded once per snapshot, keyed by the secret UID (namespace and name if it has no UID).
     from engine.jwt_token import decode_base64_jwt_token
-    try:
-        secret = api_client.CoreV1Api.read_namespaced_secret(name=volume.secret.secret_name,
-                                                             namespace=pod.metadata.namespace)
-    except Exception:
-        secret = None
-    try:
-        if secret is not None and secret.data is not None:
-            if 'token' in secret.data:
-                decoded_data = decode_base64_jwt_token(secret.data['token'])
-                token_body = json.loads(decoded_data)
-                if token_body:
-                    risky_user = get_risky_user_from_container(token_body, risky_users)
-                    return risky_user
-        raise Exception()
-    except Exception:
-        if secret is not None:
-            return get_risky_user_from_container_secret(secret, risky_users)
+    token_bodies = get_snapshot().get_derived('secret_token_bodies', dict)
+    key = secret.metadata.uid or (secret.metadata.namespace, secret.metadata.name)
+    if key not in token_bodies:
+        token_body = None
+        if secret.data and secret.data.get('token'):
+            try:
+                token_body = json.loads(decode_base64_jwt_token(secret.data['token']))
+            except Exception:
+                token_body = None
+        token_bodies[key] = token_body
+    return token_bodies[key]
+
+
+def get_jwt_and_decode(pod, risky_users, volume):
+    secret = get_snapshot().get_service_account_token_secret(volume.secret.secret_name, pod.metadata.namespace)
+    if secret is None:
+        return None
+    token_body = get_secret_token_body(secret)
+    if token_body:
+        return get_risky_user_from_container(token_body, risky_users)
+    return get_risky_user_from_container_secret(secret, risky_users)
 
 def get_risky_user_from_container_secret(secret, risky_users):
     if secret is not None:
-        global list_of_service_accounts
-        if not list_of_service_accounts:
-            list_of_service_accounts = api_client.CoreV1Api.list_service_account_for_all_namespaces()
-        for sa in list_of_service_accounts.items:
-            for service_account_secret in sa.secrets or []:
-                if secret.metadata.name == service_account_secret.name:
-                    for risky_user in risky_users:
-                        if risky_user.user_info.name == sa.metadata.name:
-                            return risky_user
-
-def get_risky_pods(namespace=None, deep_analysis=False):
-    risky_pods = []
+        service_account = get_snapshot().get_service_account_by_secret(secret.metadata.name, secret.metadata.namespace)
+        if service_account is not None:
+            return get_risky_users_index(risky_users).get(service_account.metadata.namespace, service_account.metadata.name)
+
+def get_pods_findings(namespace=None, checks=None, deep_analysis=False, collapse_replicas=False):
+    """
+    Runs the pod checks (engine.pod_analyzer, all of them by default) in a single pass over the pods.
+    With 'collapse_replicas', one pod per group of replicas is analyzed and its findings are
+    reported for the whole group (PodFindings.replicas).
+
+    :return: list of PodFindings, one per pod or group of replicas.
+    """
+    checks = checks if checks is not None else ALL_CHECKS
+    get_pod_risky_containers = None
+    if RISKY_SERVICE_ACCOUNT in checks:
+        collections = list(RBAC_COLLECTIONS)
+        if namespace is None:
+            collections.append(PODS)
+            # The deep analysis reads the tokens from the containers, it never looks at the token secrets.
+            if not deep_analysis:
+                collections.append(SERVICE_ACCOUNT_TOKEN_SECRETS)
+        get_snapshot().prefetch(collections)
     pods = list_pods_for_all_namespaces_or_one_namspace(namespace)
-    risky_users = get_all_risky_subjects()
-    for pod in pods.items:
-        risky_containers = get_risky_containers(pod, risky_users, deep_analysis)
-        if len(risky_containers) > 0:
-            risky_pods.append(Pod(pod.metadata.name, pod.metadata.namespace, risky_containers))
+    pods_replicas = group_replicas(pods) if collapse_replicas else [[pod] for pod in pods]
+    if deep_analysis:
+        # The tokens are read from the analyzed pod, prefer a replica with running containers.
+        pods_replicas = [sorted(replicas, key=lambda pod: not get_running_containers_names(pod)) for replicas in pods_replicas]
+    if RISKY_SERVICE_ACCOUNT in checks:
+        risky_users = RiskyUsersIndex(get_all_risky_subjects(expand_groups=True))
+        containers_tokens = read_running_containers_tokens([replicas[0] for replicas in pods_replicas]) if deep_analysis else None
+
+        def get_pod_risky_containers(pod):
+            return get_risky_containers(pod, risky_users, deep_analysis, containers_tokens)
+
+    return PodAnalyzer(checks, get_pod_risky_containers).analyze_replicas(pods_replicas)
+
+
+def get_risky_pods(namespace=None, deep_analysis=False, pods_findings=None, collapse_replicas=False):
+    if pods_findings is None:
+        pods_findings = get_pods_findings(namespace, [RISKY_SERVICE_ACCOUNT], deep_analysis, collapse_replicas)
+    risky_pods = []
+    for pod_findings in pods_findings:
+        if len(pod_findings.risky_containers) > 0:
+            pod = pod_findings.pod
+            risky_pods.append(Pod(pod.metadata.name, pod.metadata.namespace, pod_findings.risky_containers,
+                                  [replica.metadata.name for replica in pod_findings.replicas]))
 
     return risky_pods
 
 
+def get_workloads(namespace=None):
+    # Workloads created by another workload (the ReplicaSets of a Deployment, the Jobs of a CronJob)
+    # have the template of their owner, only the top-level ones are returned.
+    workloads = []
+    for workload in get_snapshot().workloads:
+        if namespace is not None and workload.metadata.namespace != namespace:
+            continue
+        if any(owner.controller and owner.kind in WORKLOAD_KINDS for owner in workload.metadata.owner_references or []):
+            continue
+        workloads.append(workload)
+    return workloads
+
+
+def get_template_service_account_name(pod_spec):
+    return pod_spec.service_account_name or pod_spec.service_account or 'default'
+
+
+def get_service_account(name, namespace):
+    def index_service_accounts():
+        index = {}
+        for service_account in get_snapshot().service_accounts:
+            # The first service account with the key wins, like a scan of the namespace.
+            index.setdefault((service_account.metadata.namespace, service_account.metadata.name), service_account)
+        return index
+
+    return get_snapshot().get_derived('service_accounts_index', index_service_accounts).get((namespace, name))
+
+
+def is_service_account_token_automounted(pod, service_account_name):
+    # The pod spec setting wins over the service account one, the default is to mount the token.
+    if pod.spec.automount_service_account_token is not None:
+        return pod.spec.automount_service_account_token
+    service_account = get_service_account(service_account_name, pod.metadata.namespace)
+    if service_account is not None:
+        return service_account.automount_service_account_token is not False
+    return True
+
+
+def get_template_risky_containers(pod, risky_users):
+    """
+    The risky containers of a pod template. The templates don't have the service account token
+    volume, the ServiceAccount admission plugin adds it to every container of the pods created
+    from them, unless the automount is disabled.
+    """
+    risky_users = get_risky_users_index(risky_users)
+    risky_containers = get_risky_containers(pod, risky_users)
+    service_account_name = get_template_service_account_name(pod.spec)
+    if not is_service_account_token_automounted(pod, service_account_name):
+        return risky_containers
+    risky_user = is_user_risky(risky_users, service_account_name, pod.metadata.namespace)
+    if risky_user is None:
+        return risky_containers
+
+    risky_containers_by_name = {risky_container.name: risky_container for risky_container in risky_containers}
+    template_risky_containers = []
+    for container in pod.spec.containers:
+        risky_container = risky_containers_by_name.get(container.name)
+        if risky_container is None:
+            risky_container = Container(container.name, None, pod.metadata.namespace, {risky_user}, risky_user.priority)
+        else:
+            risky_container.service_accounts_name_set.add(risky_user)
+            risky_container.priority = get_highest_priority(risky_container.service_accounts_name_set)
+        template_risky_containers.append(risky_container)
+    return template_risky_containers
+
+
+def get_workloads_findings(namespace=None, checks=None):
+    """
+    Runs the privileged and risky service account checks on the pod templates of the workloads.
+    It covers the workloads without pods (scaled to zero, CronJobs between two runs) and costs
+    one check per workload instead of one per replica.
+
+    :return: list of (workload, PodFindings) tuples.
+    """
+    checks = checks if checks is not None else [PRIVILEGED, RISKY_SERVICE_ACCOUNT]
+    get_pod_risky_containers = None
+    if RISKY_SERVICE_ACCOUNT in checks:
+        get_snapshot().prefetch(RBAC_COLLECTIONS + [WORKLOADS, SERVICE_ACCOUNTS])
+        risky_users = RiskyUsersIndex(get_all_risky_subjects(expand_groups=True))
+
+        def get_pod_risky_containers(pod):
+            return get_template_risky_containers(pod, risky_users)
+
+    analyzer = PodAnalyzer(checks, get_pod_risky_containers)
+    return [(workload, analyzer.analyze(workload.template)) for workload in get_workloads(namespace)
+            if workload.template.spec is not None and workload.template.spec.containers]
+
+
 # endregion- Risky Pods
 
 def get_rolebindings_all_namespaces_and_clusterrolebindings():
-    namespaced_rolebindings = Config.api_client.list_role_binding_for_all_namespaces()
+    namespaced_rolebindings = get_snapshot().role_bindings
 
     # TODO: check when this bug will be fixed
     # cluster_rolebindings = api_client.RbacAuthorizationV1Api.list_cluster_role_binding()
     # cluster_rolebindings = api_client.api_temp.list_cluster_role_binding()
-    cluster_rolebindings = Config.api_client.list_cluster_role_binding()
+    cluster_rolebindings = get_snapshot().cluster_role_bindings
     return namespaced_rolebindings, cluster_rolebindings
 
 
-def get_rolebindings_and_clusterrolebindings_associated_to_subject(subject_name, kind, namespace):
-    rolebindings_all_namespaces, cluster_rolebindings = get_rolebindings_all_namespaces_and_clusterrolebindings()
-    associated_rolebindings = []
-
-    for rolebinding in rolebindings_all_namespaces.items:
-        # In case 'rolebinding.subjects' is 'None', 'or []' will prevent an exception.
-        for subject in rolebinding.subjects or []:
-            if subject.name.lower() == subject_name.lower() and subject.kind.lower() == kind.lower():
-                if kind == SERVICEACCOUNT_KIND:
-                    if subject.namespace.lower() == namespace.lower():
-                        associated_rolebindings.append(rolebinding)
-                else:
-                    associated_rolebindings.append(rolebinding)
-
-    associated_clusterrolebindings = []
-    for clusterrolebinding in cluster_rolebindings:
+class SubjectsIndex:
+    """
+    Reverse index of the bindings subjects, built once from the snapshot.
+    Subjects are matched case-insensitively by kind and name, the namespace is filtered on lookup.
+    """
+
+    def __init__(self, rolebindings, cluster_rolebindings):
+        self.rolebindings = self._index_bindings(rolebindings)
+        self.cluster_rolebindings = self._index_bindings(cluster_rolebindings)
+        self.subjects_by_kind = {}
+        for binding in list(rolebindings) + list(cluster_rolebindings):
+            for subject in binding.subjects or []:
+                self.subjects_by_kind.setdefault(subject.kind.lower(), []).append(subject)
+
+    @staticmethod
+    def _index_bindings(bindings):
+        index = {}
+        for binding in bindings:
+            # In case 'binding.subjects' is 'None', 'or []' will prevent an exception.
+            for subject in binding.subjects or []:
+                subject_namespace = subject.namespace.lower() if subject.namespace is not None else None
+                index.setdefault((subject.kind.lower(), subject.name.lower()), []).append((subject_namespace, binding))
+        return index
+
+    @staticmethod
+    def _find(index, subject_name, kind, namespace):
+        entries = index.get((kind.lower(), subject_name.lower()), [])
+        if kind == SERVICEACCOUNT_KIND:
+            namespace = namespace.lower() if namespace is not None else None
+            return [binding for subject_namespace, binding in entries if subject_namespace == namespace]
+        return [binding for _, binding in entries]
+
+    def get_bindings(self, subject_name, kind, namespace):
+        return (self._find(self.rolebindings, subject_name, kind, namespace),
+                self._find(self.cluster_rolebindings, subject_name, kind, namespace))
+
+    def get_subjects(self, kind):
+        return self.subjects_by_kind.get(kind.lower(), [])
+
+
+def get_subjects_index():
+    snapshot = get_snapshot()
+    return snapshot.get_derived('subjects_index',
+                                lambda: SubjectsIndex(*get_rolebindings_all_namespaces_and_clusterrolebindings()))
 
-        # In case 'clusterrolebinding.subjects' is 'None', 'or []' will prevent an exception.
-        for subject in clusterrolebinding.subjects or []:
-            if subject.name == subject_name.lower() and subject.kind.lower() == kind.lower():
-                if kind == SERVICEACCOUNT_KIND:
-                    if subject.namespace.lower() == namespace.lower():
-                        associated_clusterrolebindings.append(clusterrolebinding)
-                else:
-                    associated_clusterrolebindings.append(clusterrolebinding)
 
-    return associated_rolebindings, associated_clusterrolebindings
+def get_rolebindings_and_clusterrolebindings_associated_to_subject(subject_name, kind, namespace):
+    return get_subjects_index().get_bindings(subject_name, kind, namespace)
 
 
 # Role can be only inside RoleBinding
 def get_rolebindings_associated_to_role(role_name, namespace):
-    rolebindings_all_namespaces = Config.api_client.list_role_binding_for_all_namespaces()
+    rolebindings_all_namespaces = get_snapshot().role_bindings
     associated_rolebindings = []
 
-    for rolebinding in rolebindings_all_namespaces.items:
+    for rolebinding in rolebindings_all_namespaces:
         if rolebinding.role_ref.name.lower() == role_name.lower() and rolebinding.role_ref.kind == ROLE_KIND and rolebinding.metadata.namespace.lower() == namespace.lower():
             associated_rolebindings.append(rolebinding)
 
@@ -577,7 +1005,7 @@ def get_rolebindings_and_clusterrolebindings_associated_to_clusterrole(role_name
 
     associated_rolebindings = []
 
-    for rolebinding in rolebindings_all_namespaces.items:
+    for rolebinding in rolebindings_all_namespaces:
         if rolebinding.role_ref.name.lower() == role_name.lower() and rolebinding.role_ref.kind == CLUSTER_ROLE_KIND:
             associated_rolebindings.append(rolebinding)
 
@@ -592,20 +1020,28 @@ def get_rolebindings_and_clusterrolebindings_associated_to_clusterrole(role_name
 
 
 def dump_containers_tokens_by_pod(pod_name, namespace, read_token_from_container=False):
-    containers_with_tokens = []
     try:
         pod = api_client.CoreV1Api.read_namespaced_pod(name=pod_name, namespace=namespace)
     except ApiException:
         print(pod_name + " was not found in " + namespace + " namespace")
         return None
+    return dump_containers_tokens(pod, read_token_from_container)
+
+
+def dump_containers_tokens(pod, read_token_from_container=False, containers_tokens=None):
+    """
+    :param containers_tokens: the tokens read from the containers of the pod, see read_running_containers_tokens().
+                              They are read here when it is not given.
+    """
+    containers_with_tokens = []
     if read_token_from_container:
-        if pod.status.container_statuses:
-            for container in pod.status.container_statuses:
-                if container.ready:
-                    jwt_body, raw_jwt_token = get_jwt_token_from_container(pod, container.name)
-                    if jwt_body:
-                        containers_with_tokens.append(
-                            Container(container.name, token=jwt_body, raw_jwt_token=raw_jwt_token))
+        if containers_tokens is None:
+            containers_tokens = read_running_containers_tokens([pod], all_containers=True)
+        for container_name in get_running_containers_names(pod):
+            jwt_body, raw_jwt_token = containers_tokens[(pod.metadata.namespace, pod.metadata.name, container_name)]
+            if jwt_body:
+                containers_with_tokens.append(
+                    Container(container_name, token=jwt_body, raw_jwt_token=raw_jwt_token))
 
     else:
         fill_container_with_tokens_list(containers_with_tokens, pod)
@@ -613,30 +1049,31 @@ def dump_containers_tokens_by_pod(pod_name, namespace, read_token_from_container
 
 
 def fill_container_with_tokens_list(containers_with_tokens, pod):
-    from engine.jwt_token import decode_base64_jwt_token
+    volumes_dict = {volume.name: volume for volume in pod.spec.volumes or []}
     for container in pod.spec.containers:
         for volume_mount in container.volume_mounts or []:
-            for volume in pod.spec.volumes or []:
-                if volume.name == volume_mount.name and volume.secret:
-                    try:
-                        secret = api_client.CoreV1Api.read_namespaced_secret(volume.secret.secret_name,
-                                                                             pod.metadata.namespace)
-                        if secret and secret.data and secret.data['token']:
-                            decoded_data = decode_base64_jwt_token(secret.data['token'])
-                            token_body = json.loads(decoded_data)
-                            containers_with_tokens.append(Container(container.name, token=token_body,
-                                                                    raw_jwt_token=None))
-                    except ApiException:
-                        print("No secret found.")
+            volume = volumes_dict.get(volume_mount.name)
+            if volume is not None and volume.secret:
+                # Secrets of other types are not fetched, they don't have a service account token.
+                secret = get_snapshot().get_service_account_token_secret(volume.secret.secret_name, pod.metadata.namespace)
+                if secret is not None:
+                    token_body = get_secret_token_body(secret)
+                    if token_body:
+                        containers_with_tokens.append(Container(container.name, token=token_body,
+                                                                raw_jwt_token=None))
 
 
 def dump_all_pods_tokens_or_by_namespace(namespace=None, read_token_from_container=False):
+    # The pods are listed once and their objects are used as is. The token secrets come from
+    # the snapshot, a single LIST of the service account token secrets instead of a GET per secret.
     pods_with_tokens = []
+    if namespace is None:
+        get_snapshot().prefetch([PODS] if read_token_from_container else [PODS, SERVICE_ACCOUNT_TOKEN_SECRETS])
     pods = list_pods_for_all_namespaces_or_one_namspace(namespace)
-    for pod in pods.items:
-        containers = dump_containers_tokens_by_pod(pod.metadata.name, pod.metadata.namespace, read_token_from_container)
-        if containers is not None:
-            pods_with_tokens.append(Pod(pod.metadata.name, pod.metadata.namespace, containers))
+    containers_tokens = read_running_containers_tokens(pods, all_containers=True) if read_token_from_container else None
+    for pod in pods:
+        containers = dump_containers_tokens(pod, read_token_from_container, containers_tokens)
+        pods_with_tokens.append(Pod(pod.metadata.name, pod.metadata.namespace, containers))
 
     return pods_with_tokens
 
@@ -659,18 +1096,7 @@ def search_subject_in_subjects_by_kind(subjects, kind):
 
 # It get subjects by kind for all rolebindings.
 def get_subjects_by_kind(kind):
-    subjects_found = []
-    rolebindings = Config.api_client.list_role_binding_for_all_namespaces()
-    clusterrolebindings = Config.api_client.list_cluster_role_binding()
-    for rolebinding in rolebindings.items:
-        if rolebinding.subjects is not None:
-            subjects_found += search_subject_in_subjects_by_kind(rolebinding.subjects, kind)
-
-    for clusterrolebinding in clusterrolebindings:
-        if clusterrolebinding.subjects is not None:
-            subjects_found += search_subject_in_subjects_by_kind(clusterrolebinding.subjects, kind)
-
-    return remove_duplicated_subjects(subjects_found)
+    return remove_duplicated_subjects(get_subjects_index().get_subjects(kind))
 
 
 def remove_duplicated_subjects(subjects):
@@ -688,54 +1114,115 @@ def remove_duplicated_subjects(subjects):
     return new_subjects
 
 
-def get_rolebinding_role(rolebinding_name, namespace):
-    rolebinding = None
-    role = None
+def read_role_ref(role_ref, namespace):
     try:
-        rolebinding = Config.api_client.read_namespaced_role_binding(rolebinding_name, namespace)
-        if rolebinding.role_ref.kind == ROLE_KIND:
-            role = Config.api_client.read_namespaced_role(rolebinding.role_ref.name,
-                                                                          rolebinding.metadata.namespace)
-        else:
-            role = Config.api_client.read_cluster_role(rolebinding.role_ref.name)
-
-        return role
+        if role_ref.kind == ROLE_KIND:
+            return Config.api_client.read_namespaced_role(role_ref.name, namespace)
+        return Config.api_client.read_cluster_role(role_ref.name)
     except ApiException:
-        if rolebinding is None:
-            print("Could not find " + rolebinding_name + " rolebinding in " + namespace + " namespace")
-        elif role is None:
-            print(
-                "Could not find " + rolebinding.role_ref.name + " role in " + rolebinding.role_ref.name + " rolebinding")
         return None
 
 
+def get_role_ref_from_snapshot(role_ref, namespace):
+    snapshot = get_snapshot()
+    if role_ref.kind == ROLE_KIND:
+        role = snapshot.get_role(role_ref.name, namespace) if snapshot.is_fetched(ROLES) else None
+    else:
+        role = snapshot.get_cluster_role(role_ref.name) if snapshot.is_fetched(CLUSTER_ROLES) else None
+    if role is not None and role.kind is None:
+        # Items of a LIST response don't have their kind set, a GET response does.
+        role = copy.copy(role)
+        role.kind = role_ref.kind
+    return role
+
+
+def get_permissions_matrix():
+    snapshot = get_snapshot()
+    snapshot.prefetch(RBAC_COLLECTIONS)
+
+    def get_role(role_ref, namespace):
+        if role_ref.kind == ROLE_KIND:
+            return snapshot.get_role(role_ref.name, namespace)
+        return snapshot.get_cluster_role(role_ref.name)
+
+    return snapshot.get_derived('permissions_matrix',
+                                lambda: PermissionsMatrix(snapshot.role_bindings, snapshot.cluster_role_bindings, get_role))
+
+
+def get_subject_permissions(subject_name, kind, namespace=None):
+    if kind.lower() != SERVICEACCOUNT_KIND.lower():
+        namespace = None
+    return get_permissions_matrix().get_subject_permissions(kind, subject_name, namespace)
+
+
+def get_subjects_who_can(verb, resource, namespace=None):
+    return get_permissions_matrix().who_can(verb, resource, namespace)
+
+
+def get_bindings_roles(bindings):
+    """
+    Resolves the roleRef of each binding, first from the roles in the snapshot and then with
+    concurrent GETs for the roles that were not found there.
+    :return: list with the role of each binding, None if it was not found.
+    """
+    roles = [get_role_ref_from_snapshot(binding.role_ref, binding.metadata.namespace) for binding in bindings]
+    missing = [index for index, role in enumerate(roles) if role is None]
+    if missing:
+        max_workers = min(get_snapshot().max_workers, len(missing))
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+            futures = {index: executor.submit(read_role_ref, bindings[index].role_ref, bindings[index].metadata.namespace)
+                       for index in missing}
+            for index, future in futures.items():
+                roles[index] = future.result()
+    return roles
+
+
+def get_rolebinding_role(rolebinding_name, namespace):
+    rolebinding = None
+    snapshot = get_snapshot()
+    if snapshot.is_fetched(ROLE_BINDINGS):
+        rolebinding = snapshot.get_role_binding(rolebinding_name, namespace)
+    if rolebinding is None:
+        try:
+            rolebinding = Config.api_client.read_namespaced_role_binding(rolebinding_name, namespace)
+        except ApiException:
+            rolebinding = None
+    if rolebinding is None:
+        print("Could not find " + rolebinding_name + " rolebinding in " + namespace + " namespace")
+        return None
+
+    role = get_bindings_roles([rolebinding])[0]
+    if role is None:
+        print("Could not find " + rolebinding.role_ref.name + " role in " + rolebinding_name + " rolebinding")
+    return role
+
+
 def get_clusterrolebinding_role(cluster_rolebinding_name):
-    cluster_role = ''
-    try:
-        cluster_rolebinding = api_client.RbacAuthorizationV1Api.read_cluster_role_binding(cluster_rolebinding_name)
-        cluster_role = api_client.RbacAuthorizationV1Api.read_cluster_role(cluster_rolebinding.role_ref.name)
-    except ApiException as e:
-        print(e)
-        exit()
+    # ClusterRoleBindings are listed with api_temp (see get_risky_clusterrolebindings), reading one
+    # with RbacAuthorizationV1Api fails on bindings without subjects.
+    cluster_rolebinding = get_snapshot().get_cluster_role_binding(cluster_rolebinding_name)
+    if cluster_rolebinding is None:
+        print("Could not find " + cluster_rolebinding_name + " clusterrolebinding")
+        return None
 
+    cluster_role = get_bindings_roles([cluster_rolebinding])[0]
+    if cluster_role is None:
+        print("Could not find " + cluster_rolebinding.role_ref.name + " clusterrole in " + cluster_rolebinding_name + " clusterrolebinding")
     return cluster_role
 
 
 def get_roles_associated_to_subject(subject_name, kind, namespace):
+    get_snapshot().prefetch(RBAC_COLLECTIONS)
     associated_rolebindings, associated_clusterrolebindings = get_rolebindings_and_clusterrolebindings_associated_to_subject(
         subject_name, kind, namespace)
 
+    associated_bindings = associated_rolebindings + associated_clusterrolebindings
     associated_roles = []
-    for rolebind in associated_rolebindings:
-        try:
-            role = get_rolebinding_role(rolebind.metadata.name, rolebind.metadata.namespace)
-            associated_roles.append(role)
-        except ApiException as e:
+    for binding, role in zip(associated_bindings, get_bindings_roles(associated_bindings)):
+        if role is None:
             # 404 not found
+            print("Could not find " + binding.role_ref.name + " role in " + binding.metadata.name + " binding")
             continue
-
-    for clusterrolebinding in associated_clusterrolebindings:
-        role = get_clusterrolebinding_role(clusterrolebinding.metadata.name)
         associated_roles.append(role)
 
     return associated_roles
@@ -743,11 +1230,7 @@ def get_roles_associated_to_subject(subject_name, kind, namespace):
 
 def list_pods_for_all_namespaces_or_one_namspace(namespace=None):
     try:
-        if namespace is None:
-            pods = Config.api_client.list_pod_for_all_namespaces(watch=False)
-        else:
-            pods = Config.api_client.list_namespaced_pod(namespace)
-        return pods
+        return get_snapshot().get_pods(namespace)
     except ApiException:
         return None
 
@@ -6,3 +6,12 @@ CLUSTER_ROLE_BINDING_KIND = 'ClusterRoleBinding'
 USER_KIND = 'User'
 GROUP_KIND = 'Group'
 SERVICEACCOUNT_KIND = 'ServiceAccount'
+
+# Built-in groups of the service accounts
+SERVICEACCOUNTS_GROUP = 'system:serviceaccounts'
+AUTHENTICATED_GROUP = 'system:authenticated'
+
+# Directories where the service account token is mounted in the containers
+SERVICE_ACCOUNT_TOKEN_DIRS = ('/run/secrets/kubernetes.io/serviceaccount', '/var/run/secrets/kubernetes.io/serviceaccount')
+SERVICE_ACCOUNT_FILES = ('token', 'ca.crt', 'namespace')
+SERVICE_ACCOUNT_FILES_SEPARATOR = '--kubiscan-end-of-file--'
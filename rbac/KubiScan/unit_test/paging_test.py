@@ -0,0 +1,88 @@
+import json
+import unittest
+
+from kubernetes.client import V1ListMeta, V1ObjectMeta, V1Pod, V1PodList
+from kubernetes.client.rest import ApiException
+
+from api.api_client import list_in_pages, list_raw_in_pages
+
+
+class FakePods:
+    """Serves the pods in pages. The continue tokens given after 'expire_after' pages are expired."""
+
+    def __init__(self, count, expire_after=None, expired_continue=True):
+        self.uids = [f"uid-{number}" for number in range(count)]
+        self.expire_after = expire_after
+        self.expired_continue = expired_continue
+        self.requests = []
+
+    def get_page(self, limit=None, _continue=None):
+        self.requests.append((limit, _continue))
+        if _continue and self.expire_after is not None and len(self.requests) > self.expire_after:
+            self.expire_after = None
+            error = ApiException(status=410, reason='Gone')
+            # The token of the 410 response goes on from the same position.
+            metadata = {'continue': _continue} if self.expired_continue else {}
+            error.body = json.dumps({'kind': 'Status', 'status': 'Failure', 'reason': 'Expired', 'code': 410, 'metadata': metadata})
+            raise error
+        start = int(_continue) if _continue else 0
+        end = start + limit if limit else len(self.uids)
+        return self.uids[start:end], str(end) if end < len(self.uids) else None
+
+    def list_models(self, limit=None, _continue=None, _request_timeout=None):
+        uids, next_continue = self.get_page(limit, _continue)
+        return V1PodList(items=[V1Pod(metadata=V1ObjectMeta(uid=uid)) for uid in uids],
+                         metadata=V1ListMeta(_continue=next_continue))
+
+    def list_raw(self, limit=None, _continue=None, _request_timeout=None, _preload_content=True):
+        uids, next_continue = self.get_page(limit, _continue)
+        data = json.dumps({'items': [{'metadata': {'uid': uid}} for uid in uids], 'metadata': {'continue': next_continue}})
+        return type('Response', (), {'data': data})
+
+
+def read_models(pods, page_size):
+    return [pod.metadata.uid for pod in list_in_pages(pods.list_models, page_size)]
+
+
+def read_raw(pods, page_size):
+    return [item['metadata']['uid'] for item in list_raw_in_pages(pods.list_raw, page_size, lambda item: item)]
+
+
+class TestListInPages(unittest.TestCase):
+
+    def test_pages(self):
+        for read in (read_models, read_raw):
+            pods = FakePods(25)
+            self.assertEqual(read(pods, 10), pods.uids)
+            self.assertEqual([limit for limit, _ in pods.requests], [10, 10, 10])
+
+    def test_without_page_size(self):
+        for read in (read_models, read_raw):
+            pods = FakePods(25)
+            self.assertEqual(read(pods, None), pods.uids)
+            self.assertEqual(len(pods.requests), 1)
+
+    def test_expired_continue_goes_on_with_the_new_token(self):
+        for read in (read_models, read_raw):
+            pods = FakePods(25, expire_after=1)
+            self.assertEqual(read(pods, 10), pods.uids)
+            self.assertEqual(pods.requests, [(10, None), (10, '10'), (10, '10'), (10, '20')])
+
+    def test_expired_continue_without_token_lists_again(self):
+        for read in (read_models, read_raw):
+            pods = FakePods(25, expire_after=2, expired_continue=False)
+            self.assertEqual(read(pods, 10), pods.uids)
+            self.assertEqual(pods.requests, [(10, None), (10, '10'), (10, '20'), (None, None)])
+
+    def test_other_errors_are_raised(self):
+        pods = FakePods(25)
+
+        def list_forbidden(limit=None, _continue=None, _request_timeout=None):
+            raise ApiException(status=403, reason='Forbidden')
+
+        with self.assertRaises(ApiException):
+            list(list_in_pages(list_forbidden, 10))
+
+
+if __name__ == '__main__':
+    unittest.main()
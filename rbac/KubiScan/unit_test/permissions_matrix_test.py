@@ -0,0 +1,144 @@
+import random
+import unittest
+
+from kubernetes.client import V1ClusterRole, V1ObjectMeta, V1PolicyRule, V1Role, V1RoleBinding, V1RoleRef, V1Subject
+
+from engine.permissions_matrix import ALL, PermissionsMatrix
+
+NAMESPACES = ['default', 'kube-system', 'dev']
+SUBJECTS = [('User', None, 'alice'), ('User', None, 'Alice'), ('Group', None, 'system:masters'),
+            ('ServiceAccount', 'default', 'default'), ('ServiceAccount', 'dev', 'default'), ('ServiceAccount', 'dev', 'deployer')]
+VERBS = ['get', 'list', 'create', 'delete', '*']
+RESOURCES = ['pods', 'secrets', 'deployments', 'pods/exec', '*']
+API_GROUPS = ['', 'apps', '*']
+RESOURCE_NAMES = ['a', 'b']
+
+
+def as_tuple(permission):
+    return (permission.subject_kind, permission.subject_namespace, permission.subject_name, permission.namespace,
+            permission.verb, permission.api_group, permission.resource, permission.resource_name)
+
+
+class TestPermissionsMatrix(unittest.TestCase):
+
+    def setUp(self):
+        generator = random.Random(0)
+
+        def random_rules():
+            rules = []
+            for _ in range(generator.randint(0, 3)):
+                rules.append(V1PolicyRule(verbs=generator.sample(VERBS, generator.randint(1, 2)),
+                                          resources=generator.sample(RESOURCES, generator.randint(1, 2)),
+                                          api_groups=generator.sample(API_GROUPS, generator.randint(1, 2)),
+                                          resource_names=generator.sample(RESOURCE_NAMES, 1) if generator.random() < 0.2 else None))
+            if generator.random() < 0.1:
+                rules.append(V1PolicyRule(verbs=['get'], non_resource_ur_ls=['/healthz']))
+            return rules
+
+        def random_subjects():
+            return [V1Subject(kind=kind, namespace=namespace, name=name)
+                    for kind, namespace, name in generator.sample(SUBJECTS, generator.randint(0, 3))]
+
+        self.roles = {(namespace, f"role-{number}"): V1Role(metadata=V1ObjectMeta(name=f"role-{number}", namespace=namespace),
+                                                              rules=random_rules())
+                      for namespace in NAMESPACES for number in range(5)}
+        self.cluster_roles = {f"clusterrole-{number}": V1ClusterRole(metadata=V1ObjectMeta(name=f"clusterrole-{number}"),
+                                                                     rules=random_rules())
+                              for number in range(5)}
+        self.rolebindings = []
+        for number in range(40):
+            namespace = generator.choice(NAMESPACES)
+            if generator.random() < 0.5:
+                role_ref = V1RoleRef(api_group='rbac.authorization.k8s.io', kind='Role', name=f"role-{generator.randint(0, 5)}")
+            else:
+                role_ref = V1RoleRef(api_group='rbac.authorization.k8s.io', kind='ClusterRole',
+                                     name=f"clusterrole-{generator.randint(0, 5)}")
+            self.rolebindings.append(V1RoleBinding(metadata=V1ObjectMeta(name=f"rb-{number}", namespace=namespace),
+                                                   role_ref=role_ref, subjects=random_subjects()))
+        self.cluster_rolebindings = [
+            V1RoleBinding(metadata=V1ObjectMeta(name=f"crb-{number}"), subjects=random_subjects(),
+                          role_ref=V1RoleRef(api_group='rbac.authorization.k8s.io', kind='ClusterRole',
+                                             name=f"clusterrole-{generator.randint(0, 5)}"))
+            for number in range(10)]
+        self.matrix = PermissionsMatrix(self.rolebindings, self.cluster_rolebindings, self.get_role)
+        self.expected = self.get_expected_permissions()
+
+    def get_role(self, role_ref, namespace):
+        if role_ref.kind == 'Role':
+            return self.roles.get((namespace, role_ref.name))
+        return self.cluster_roles.get(role_ref.name)
+
+    def get_expected_permissions(self):
+        # Every binding, role rule and subject expanded one by one.
+        permissions = set()
+        for bindings, is_cluster_binding in ((self.rolebindings, False), (self.cluster_rolebindings, True)):
+            for binding in bindings:
+                role = self.get_role(binding.role_ref, binding.metadata.namespace)
+                if role is None:
+                    continue
+                namespace = ALL if is_cluster_binding else binding.metadata.namespace
+                for rule in role.rules or []:
+                    for subject in binding.subjects or []:
+                        for verb in rule.verbs:
+                            for api_group in rule.api_groups or ['']:
+                                for resource in rule.resources or []:
+                                    for resource_name in rule.resource_names or [ALL]:
+                                        permissions.add((subject.kind, subject.namespace, subject.name, namespace,
+                                                         verb, api_group, resource, resource_name))
+        return permissions
+
+    def test_size(self):
+        self.assertEqual(len(self.matrix), len(self.expected))
+
+    def test_get_subject_permissions(self):
+        for kind, namespace, name in SUBJECTS + [('User', None, 'nobody'), ('ServiceAccount', 'kube-system', 'default')]:
+            permissions = [as_tuple(permission) for permission in self.matrix.get_subject_permissions(kind, name, namespace)]
+            self.assertEqual(len(permissions), len(set(permissions)))
+            expected = {permission for permission in self.expected
+                        if (permission[0].lower(), permission[1], permission[2].lower()) == (kind.lower(), namespace, name.lower())}
+            self.assertEqual(set(permissions), expected)
+
+    def test_get_subject_permissions_ignores_case(self):
+        for kind, namespace, name in SUBJECTS:
+            permissions = [as_tuple(permission) for permission in self.matrix.get_subject_permissions(kind, name, namespace)]
+            other_case = self.matrix.get_subject_permissions(kind.upper(), name.swapcase(), namespace.upper() if namespace else None)
+            self.assertEqual([as_tuple(permission) for permission in other_case], permissions)
+        alice = {permission[2] for permission in self.expected if permission[2].lower() == 'alice'}
+        found = {permission.subject_name for permission in self.matrix.get_subject_permissions('user', 'ALICE')}
+        self.assertEqual(found, alice)
+
+    def test_who_can(self):
+        for verb in VERBS:
+            for resource in RESOURCES:
+                for namespace in NAMESPACES + [None]:
+                    permissions = [as_tuple(permission) for permission in self.matrix.who_can(verb, resource, namespace)]
+                    expected = {permission for permission in self.expected
+                                if permission[4] in (verb, ALL) and permission[6] in (resource, ALL)
+                                and (namespace is None or permission[3] in (namespace, ALL))}
+                    self.assertEqual(len(permissions), len(set(permissions)))
+                    self.assertEqual(set(permissions), expected, f"{verb} {resource} in {namespace}")
+
+    def test_who_can_with_api_group_and_resource_name(self):
+        for api_group in API_GROUPS:
+            for resource_name in RESOURCE_NAMES:
+                permissions = {as_tuple(permission)
+                               for permission in self.matrix.who_can('get', 'secrets', api_group=api_group, resource_name=resource_name)}
+                expected = {permission for permission in self.expected
+                            if permission[4] in ('get', ALL) and permission[6] in ('secrets', ALL)
+                            and permission[5] in (api_group, ALL) and permission[7] in (resource_name, ALL)}
+                self.assertEqual(permissions, expected)
+
+    def test_missing_roles_and_subjects(self):
+        bindings = [V1RoleBinding(metadata=V1ObjectMeta(name='no-subjects', namespace='default'), subjects=None,
+                                  role_ref=V1RoleRef(api_group='rbac.authorization.k8s.io', kind='ClusterRole', name='clusterrole-0')),
+                    V1RoleBinding(metadata=V1ObjectMeta(name='no-role', namespace='default'),
+                                  subjects=[V1Subject(kind='User', name='alice')],
+                                  role_ref=V1RoleRef(api_group='rbac.authorization.k8s.io', kind='Role', name='missing'))]
+        matrix = PermissionsMatrix(bindings, [], self.get_role)
+        self.assertEqual(len(matrix), 0)
+        self.assertEqual(matrix.get_subject_permissions('User', 'alice'), [])
+        self.assertEqual(matrix.who_can('get', 'pods'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
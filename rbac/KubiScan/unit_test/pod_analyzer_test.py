@@ -0,0 +1,104 @@
+import unittest
+
+from kubernetes.client import (V1Container, V1ObjectMeta, V1OwnerReference, V1Pod, V1PodSpec, V1SecurityContext)
+
+from engine.pod_analyzer import PRIVILEGED, PodAnalyzer, get_replicas_key, group_replicas
+
+
+def owner(kind, name, uid=None, controller=True):
+    return V1OwnerReference(api_version='v1', kind=kind, name=name, uid=uid or f"uid-{kind}-{name}", controller=controller)
+
+
+def make_pod(name, owners=None, labels=None, namespace='default', privileged=False):
+    container = V1Container(name=name, image='busybox', security_context=V1SecurityContext(privileged=privileged))
+    return V1Pod(metadata=V1ObjectMeta(name=name, namespace=namespace, labels=labels, owner_references=owners),
+                 spec=V1PodSpec(containers=[container]))
+
+
+def get_names(groups):
+    return [[pod.metadata.name for pod in group] for group in groups]
+
+
+class TestGroupReplicas(unittest.TestCase):
+
+    def test_replica_set_pods(self):
+        replica_set = [owner('ReplicaSet', 'web-abc')]
+        pods = [make_pod('web-abc-1', replica_set, {'pod-template-hash': 'abc'}),
+                make_pod('single'),
+                make_pod('web-abc-2', replica_set, {'pod-template-hash': 'abc'})]
+        self.assertEqual(get_names(group_replicas(pods)), [['web-abc-1', 'web-abc-2'], ['single']])
+
+    def test_static_pods_are_not_grouped(self):
+        # Mirror pods are owned by their Node with controller: true, each one has its own spec.
+        node = [owner('Node', 'control-plane')]
+        pods = [make_pod(f"{component}-control-plane", node, {'component': component, 'tier': 'control-plane'}, 'kube-system', True)
+                for component in ('etcd', 'kube-apiserver', 'kube-controller-manager', 'kube-scheduler')]
+        self.assertEqual(get_names(group_replicas(pods)), [[pod.metadata.name] for pod in pods])
+        for pod in pods:
+            self.assertIsNone(get_replicas_key(pod))
+
+    def test_other_controllers_are_not_grouped(self):
+        pods = [make_pod(f"pod-{number}", [owner('MyOperator', 'instance')], {'pod-template-hash': 'abc'}) for number in range(2)]
+        self.assertEqual(get_names(group_replicas(pods)), [['pod-0'], ['pod-1']])
+
+    def test_template_hash_label_is_required(self):
+        for kind in ('ReplicaSet', 'StatefulSet', 'DaemonSet'):
+            pods = [make_pod(f"pod-{number}", [owner(kind, 'controller')], {'app': 'web'}) for number in range(2)]
+            self.assertEqual(get_names(group_replicas(pods)), [['pod-0'], ['pod-1']], kind)
+
+    def test_job_pods(self):
+        # Job pods have no template hash label, the template of a Job can't change.
+        job = [owner('Job', 'backup', 'uid-1')]
+        rerun_job = [owner('Job', 'backup', 'uid-2')]
+        pods = [make_pod('backup-a', job, {'batch.kubernetes.io/controller-uid': 'uid-1', 'job-name': 'backup'}),
+                make_pod('backup-b', job, {'batch.kubernetes.io/controller-uid': 'uid-1', 'job-name': 'backup'}),
+                make_pod('backup-c', rerun_job, {'batch.kubernetes.io/controller-uid': 'uid-2', 'job-name': 'backup'}),
+                make_pod('backup-d', job)]
+        self.assertEqual(get_names(group_replicas(pods)), [['backup-a', 'backup-b', 'backup-d'], ['backup-c']])
+
+    def test_replication_controller_pods_are_not_grouped(self):
+        # The template of a ReplicationController can be updated and its pods have no revision label.
+        pods = [make_pod(f"pod-{number}", [owner('ReplicationController', 'web')], {'app': 'web'}) for number in range(2)]
+        self.assertEqual(get_names(group_replicas(pods)), [['pod-0'], ['pod-1']])
+
+    def test_template_revisions(self):
+        stateful_set = [owner('StatefulSet', 'db')]
+        daemon_set = [owner('DaemonSet', 'agent')]
+        pods = [make_pod('db-0', stateful_set, {'controller-revision-hash': 'db-1'}),
+                make_pod('db-1', stateful_set, {'controller-revision-hash': 'db-2'}),
+                make_pod('db-2', stateful_set, {'controller-revision-hash': 'db-1'}),
+                make_pod('agent-a', daemon_set, {'controller-revision-hash': 'agent-1'}),
+                make_pod('agent-b', daemon_set, {'controller-revision-hash': 'agent-1'})]
+        self.assertEqual(get_names(group_replicas(pods)), [['db-0', 'db-2'], ['db-1'], ['agent-a', 'agent-b']])
+
+    def test_same_controller_name_in_other_namespace_or_uid(self):
+        pods = [make_pod('web-1', [owner('ReplicaSet', 'web', 'uid-1')], {'pod-template-hash': 'abc'}, 'team-a'),
+                make_pod('web-2', [owner('ReplicaSet', 'web', 'uid-1')], {'pod-template-hash': 'abc'}, 'team-b'),
+                make_pod('web-3', [owner('ReplicaSet', 'web', 'uid-2')], {'pod-template-hash': 'abc'}, 'team-a')]
+        self.assertEqual(get_names(group_replicas(pods)), [['web-1'], ['web-2'], ['web-3']])
+
+    def test_non_controller_owners_are_ignored(self):
+        pods = [make_pod(f"pod-{number}", [owner('ReplicaSet', 'web', controller=False)], {'pod-template-hash': 'abc'})
+                for number in range(2)]
+        self.assertEqual(get_names(group_replicas(pods)), [['pod-0'], ['pod-1']])
+
+
+class TestPodAnalyzerReplicas(unittest.TestCase):
+
+    def test_privileged_static_pods_with_collapsed_replicas(self):
+        node = [owner('Node', 'control-plane')]
+        replica_set = [owner('ReplicaSet', 'web-abc')]
+        pods = [make_pod('etcd-control-plane', node, {'component': 'etcd'}, 'kube-system', True),
+                make_pod('kube-apiserver-control-plane', node, {'component': 'kube-apiserver'}, 'kube-system', True),
+                make_pod('web-abc-1', replica_set, {'pod-template-hash': 'abc'}, privileged=True),
+                make_pod('web-abc-2', replica_set, {'pod-template-hash': 'abc'}, privileged=True)]
+        pods_findings = PodAnalyzer([PRIVILEGED]).analyze_replicas(group_replicas(pods))
+        privileged = [(findings.pod.metadata.name, [replica.metadata.name for replica in findings.replicas])
+                      for findings in pods_findings if findings.get_privileged_containers()]
+        self.assertEqual(privileged, [('etcd-control-plane', ['etcd-control-plane']),
+                                      ('kube-apiserver-control-plane', ['kube-apiserver-control-plane']),
+                                      ('web-abc-1', ['web-abc-1', 'web-abc-2'])])
+
+
+if __name__ == '__main__':
+    unittest.main()
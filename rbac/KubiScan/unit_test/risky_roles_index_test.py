@@ -0,0 +1,93 @@
+import random
+import unittest
+
+from kubernetes.client import V1ObjectMeta, V1PolicyRule, V1Role
+
+from engine.priority import Priority
+from engine.risky_roles_index import RiskyRolesIndex
+from engine.role import Role
+from engine.rule import Rule
+from engine.utils import are_rules_contain_other_rules, is_rule_contains_risky_rule
+from static_risky_roles import STATIC_RISKY_ROLES
+
+
+def get_matching_risky_role(role, risky_roles=STATIC_RISKY_ROLES):
+    """The matcher replaced by RiskyRolesIndex: every template checked in file order."""
+    for risky_role in risky_roles:
+        if are_rules_contain_other_rules(role.metadata.name, role.rules, risky_role.rules):
+            return risky_role
+    return None
+
+
+def make_role(name, rules):
+    return V1Role(metadata=V1ObjectMeta(name=name, namespace='default'), rules=rules)
+
+
+class TestRiskyRolesIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = RiskyRolesIndex(STATIC_RISKY_ROLES, is_rule_contains_risky_rule)
+        self.verbs = sorted({verb for risky_role in STATIC_RISKY_ROLES for rule in risky_role.rules for verb in rule.verbs})
+        self.resources = sorted({resource for risky_role in STATIC_RISKY_ROLES for rule in risky_role.rules
+                                 for resource in rule.resources})
+        self.verbs += ['*', 'watch', 'deletecollection']
+        self.resources += ['*', 'configmaps', 'services']
+
+    def assert_same_match(self, role):
+        expected = get_matching_risky_role(role)
+        found = self.index.get_matching_risky_role(role.metadata.name, role.rules)
+        self.assertIs(found, expected, f"rules: {role.rules}")
+
+    def test_shipped_templates_match_by_rules_only(self):
+        self.assertTrue(self.index.matches_by_rules_only)
+
+    def test_each_template_matches_itself(self):
+        for risky_role in STATIC_RISKY_ROLES:
+            rules = [V1PolicyRule(verbs=list(rule.verbs), resources=list(rule.resources)) for rule in risky_role.rules]
+            role = make_role(risky_role.name, rules)
+            self.assert_same_match(role)
+            self.assertIsNotNone(self.index.get_matching_risky_role(role.metadata.name, role.rules))
+
+    def test_templates_with_several_rules(self):
+        # The first rule of each multi rules template alone is not enough.
+        for risky_role in STATIC_RISKY_ROLES:
+            if len(risky_role.rules) > 1:
+                rule = risky_role.rules[0]
+                self.assert_same_match(make_role('partial', [V1PolicyRule(verbs=rule.verbs, resources=rule.resources)]))
+
+    def test_empty_rules(self):
+        for rules in (None, [], [V1PolicyRule(verbs=['get'], resources=None, non_resource_ur_ls=['/healthz'])]):
+            role = make_role('empty', rules)
+            self.assert_same_match(role)
+            self.assertIsNone(self.index.get_matching_risky_role(role.metadata.name, role.rules))
+
+    def test_random_roles(self):
+        generator = random.Random(0)
+        for role_number in range(3000):
+            rules = []
+            for _ in range(generator.randint(1, 4)):
+                rules.append(V1PolicyRule(verbs=generator.sample(self.verbs, generator.randint(1, 4)),
+                                          resources=generator.sample(self.resources, generator.randint(1, 3))))
+            self.assert_same_match(make_role(f"role-{role_number}", rules))
+
+    def test_first_template_in_file_order_wins(self):
+        risky_roles = [Role('pods', Priority.HIGH, [Rule(['get'], ['pods'])]),
+                       Role('pods-and-secrets', Priority.CRITICAL, [Rule(['get'], ['pods']), Rule(['get'], ['secrets'])]),
+                       Role('secrets', Priority.CRITICAL, [Rule(['get'], ['secrets'])])]
+        index = RiskyRolesIndex(risky_roles, is_rule_contains_risky_rule)
+        role = make_role('reader', [V1PolicyRule(verbs=['get', 'list'], resources=['secrets', 'pods'])])
+        self.assertIs(index.get_matching_risky_role(role.metadata.name, role.rules), risky_roles[0])
+        role = make_role('secrets-reader', [V1PolicyRule(verbs=['get'], resources=['secrets'])])
+        self.assertIs(index.get_matching_risky_role(role.metadata.name, role.rules), risky_roles[2])
+        self.assertIs(get_matching_risky_role(role, risky_roles), risky_roles[2])
+
+    def test_repeated_rules_are_counted(self):
+        # Like are_rules_contain_other_rules(), one role rule containing both template rules matches.
+        risky_roles = [Role('two-rules', Priority.HIGH, [Rule(['get'], ['pods']), Rule(['get'], ['pods'])])]
+        index = RiskyRolesIndex(risky_roles, is_rule_contains_risky_rule)
+        role = make_role('pods-reader', [V1PolicyRule(verbs=['get'], resources=['pods'])])
+        self.assertIs(index.get_matching_risky_role(role.metadata.name, role.rules), get_matching_risky_role(role, risky_roles))
+
+
+if __name__ == '__main__':
+    unittest.main()
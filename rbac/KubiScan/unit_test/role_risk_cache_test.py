@@ -0,0 +1,119 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from kubernetes.client import V1PolicyRule
+
+from engine.priority import Priority
+from engine.role import Role
+from engine.role_risk_cache import RoleRiskCache, get_risky_roles_fingerprint, get_rules_fingerprint
+from engine.rule import Rule
+
+KUBISCAN_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def rule(verbs, resources, resource_names=None):
+    return V1PolicyRule(verbs=verbs, resources=resources, resource_names=resource_names)
+
+
+class TestRulesFingerprint(unittest.TestCase):
+
+    def test_order_does_not_matter(self):
+        rules = [rule(['get', 'list'], ['pods', 'secrets']), rule(['create'], ['pods/exec'])]
+        reordered = [rule(['create'], ['pods/exec']), rule(['list', 'get', 'get'], ['secrets', 'pods'])]
+        self.assertEqual(get_rules_fingerprint(rules), get_rules_fingerprint(reordered))
+
+    def test_only_matched_fields_are_used(self):
+        rules = [rule(['get'], ['pods'])]
+        with_api_groups = [V1PolicyRule(verbs=['get'], resources=['pods'], api_groups=['', 'apps'])]
+        self.assertEqual(get_rules_fingerprint(rules), get_rules_fingerprint(with_api_groups))
+
+    def test_different_rules(self):
+        fingerprints = {get_rules_fingerprint(rules) for rules in (
+            [rule(['get'], ['pods'])],
+            [rule(['get'], ['pods']), rule(['get'], ['pods'])],
+            [rule(['get'], ['secrets'])],
+            [rule(['list'], ['pods'])],
+            [rule(['get'], None)],
+            [rule(['get'], ['pods'], ['a'])],
+            [rule(['get'], ['pods'], [])],
+            [rule(['get', 'list'], ['pods'])],
+        )}
+        self.assertEqual(len(fingerprints), 8)
+
+    def test_empty_rules(self):
+        self.assertEqual(get_rules_fingerprint(None), get_rules_fingerprint([]))
+
+    def test_stable_across_processes(self):
+        # The fingerprints are saved to the cache file, so they can't depend on the hash seed.
+        code = ("from kubernetes.client import V1PolicyRule\n"
+                "from engine.role_risk_cache import get_rules_fingerprint\n"
+                "print(get_rules_fingerprint([V1PolicyRule(verbs=['get', 'list', 'watch'], resources=['pods', 'secrets', 'nodes'])]))")
+        fingerprints = set()
+        for hash_seed in ('1', '2', '3'):
+            environment = dict(os.environ, PYTHONHASHSEED=hash_seed)
+            output = subprocess.run([sys.executable, '-c', code], cwd=KUBISCAN_DIRECTORY, env=environment,
+                                    stdout=subprocess.PIPE, check=True, text=True).stdout
+            fingerprints.add(output.strip())
+        self.assertEqual(len(fingerprints), 1)
+
+
+class TestRoleRiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.risky_roles = [Role('secrets', Priority.CRITICAL, [Rule(['get'], ['secrets'])]),
+                            Role('exec', Priority.HIGH, [Rule(['create'], ['pods/exec']), Rule(['get'], ['pods'])])]
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'risk_cache.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def save_cache(self, risky_roles):
+        cache = RoleRiskCache(get_risky_roles_fingerprint(risky_roles))
+        cache.set('risky', True, Priority.CRITICAL)
+        cache.set('not-risky', False, Priority.LOW)
+        cache.save(self.path)
+
+    def load_cache(self, risky_roles):
+        cache = RoleRiskCache(get_risky_roles_fingerprint(risky_roles))
+        cache.load(self.path)
+        return cache
+
+    def test_save_and_load(self):
+        self.save_cache(self.risky_roles)
+        cache = self.load_cache(self.risky_roles)
+        self.assertEqual(cache.get('risky'), (True, Priority.CRITICAL))
+        self.assertEqual(cache.get('not-risky'), (False, Priority.LOW))
+        self.assertIsNone(cache.get('unknown'))
+
+    def test_templates_change_invalidates_the_file(self):
+        self.save_cache(self.risky_roles)
+        changed_templates = [
+            self.risky_roles + [Role('nodes', Priority.HIGH, [Rule(['get'], ['nodes'])])],
+            self.risky_roles[::-1],
+            [Role('secrets', Priority.HIGH, [Rule(['get'], ['secrets'])]), self.risky_roles[1]],
+            [Role('secrets', Priority.CRITICAL, [Rule(['get', 'list'], ['secrets'])]), self.risky_roles[1]],
+        ]
+        for risky_roles in changed_templates:
+            self.assertNotEqual(get_risky_roles_fingerprint(risky_roles), get_risky_roles_fingerprint(self.risky_roles))
+            self.assertIsNone(self.load_cache(risky_roles).get('risky'))
+
+    def test_missing_or_invalid_file(self):
+        self.assertIsNone(self.load_cache(self.risky_roles).get('risky'))
+        with open(self.path, 'w') as file:
+            file.write('{"risky_roles": ')
+        self.assertIsNone(self.load_cache(self.risky_roles).get('risky'))
+
+    def test_computed_results_are_kept_over_loaded_ones(self):
+        self.save_cache(self.risky_roles)
+        cache = RoleRiskCache(get_risky_roles_fingerprint(self.risky_roles))
+        cache.set('risky', False, Priority.LOW)
+        cache.load(self.path)
+        self.assertEqual(cache.get('risky'), (False, Priority.LOW))
+
+
+if __name__ == '__main__':
+    unittest.main()
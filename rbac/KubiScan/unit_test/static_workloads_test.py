@@ -0,0 +1,56 @@
+import json
+import os
+import tempfile
+import unittest
+
+from api.config import set_api_client
+from api.static_api_client import StaticApiClient
+from engine.pod_analyzer import PRIVILEGED
+from engine.utils import get_workloads_findings
+
+
+def make_deployment(name, volumes):
+    # Scaled to zero, the Deployment is only seen through its pod template.
+    return {'apiVersion': 'apps/v1', 'kind': 'Deployment', 'metadata': {'name': name, 'namespace': 'default'},
+            'spec': {'replicas': 0, 'template': {'spec': {
+                'containers': [{'name': name, 'image': 'nginx',
+                                'volumeMounts': [{'name': volume['name'], 'mountPath': f"/mnt/{volume['name']}"}
+                                                 for volume in volumes]}],
+                'volumes': volumes}}}}
+
+
+class TestStaticWorkloads(unittest.TestCase):
+
+    def setUp(self):
+        items = [make_deployment('config', [{'name': 'config', 'configMap': {'name': 'nginx-config'}},
+                                            {'name': 'token', 'projected': {'sources': [{'configMap': {'name': 'ca'}}]}},
+                                            {'name': 'cache', 'emptyDir': {}}]),
+                 make_deployment('certs', [{'name': 'certs', 'secret': {'secretName': 'tls'}}]),
+                 make_deployment('logs', [{'name': 'logs', 'hostPath': {'path': '/var/log'}}])]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cluster.json')
+            with open(path, 'w') as file:
+                json.dump({'apiVersion': 'v1', 'kind': 'List', 'items': items}, file)
+            set_api_client(StaticApiClient(path))
+        self.addCleanup(set_api_client, None)
+
+    def get_privileged_workloads(self):
+        return [workload.metadata.name for workload, findings in get_workloads_findings(checks=[PRIVILEGED])
+                if findings.get_privileged_containers()]
+
+    def test_only_host_path_volumes_are_privileged(self):
+        self.assertEqual(self.get_privileged_workloads(), ['logs'])
+
+    def test_volume_sources(self):
+        volumes = {volume.name: volume for workload, _ in get_workloads_findings(checks=[PRIVILEGED])
+                   for volume in workload.template.spec.volumes}
+        self.assertIsNone(volumes['config'].host_path)
+        self.assertIsNone(volumes['config'].secret)
+        self.assertIsNone(volumes['token'].projected.sources[0].service_account_token)
+        self.assertEqual(volumes['certs'].secret.secret_name, 'tls')
+        self.assertIsNone(volumes['certs'].host_path)
+        self.assertEqual(volumes['logs'].host_path.path, '/var/log')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import io
+import json
+import unittest
+
+import yaml
+
+from api.streaming_loader import iter_json_items, iter_yaml_items
+
+
+def pod(name):
+    return {"kind": "Pod", "metadata": {"name": name, "namespace": "default"},
+            "spec": {"containers": [{"name": "c", "image": "busybox", "ports": [{"containerPort": 8080}]}]}}
+
+
+def get_yaml_items(text):
+    """The items the reader replaces: safe_load_all() of the whole file."""
+    items = []
+    for document in yaml.safe_load_all(text):
+        if isinstance(document, dict):
+            items.extend(document.get('items') or [])
+    return items
+
+
+class TestJsonItemReader(unittest.TestCase):
+
+    def read(self, text, chunk_size):
+        return list(iter_json_items(io.StringIO(text), chunk_size=chunk_size))
+
+    def test_single_list(self):
+        items = [pod("a"), pod("b")]
+        text = json.dumps({"apiVersion": "v1", "kind": "List", "items": items})
+        self.assertEqual(self.read(text, 1024), items)
+
+    def test_array_of_lists(self):
+        lists = [{"kind": "RoleList", "items": [{"kind": "Role", "metadata": {"name": "r"}}]},
+                 {"kind": "PodList", "items": [pod("a")]},
+                 {"kind": "SecretList", "items": []}]
+        self.assertEqual(self.read(json.dumps(lists), 1024), [{"kind": "Role", "metadata": {"name": "r"}}, pod("a")])
+
+    def test_keys_around_items(self):
+        text = json.dumps({"kind": "List", "metadata": {"resourceVersion": "1", "items": [1]},
+                           "items": [pod("a")], "extra": {"items": [pod("b")]}})
+        self.assertEqual(self.read(text, 1024), [pod("a")])
+
+    def test_documents_without_items(self):
+        self.assertEqual(self.read('[{}, {"kind": "List"}, 3, "items", {"items": null}]', 1024), [])
+        self.assertEqual(self.read('{}', 1024), [])
+        self.assertEqual(self.read('[]', 1024), [])
+
+    def test_chunk_boundaries(self):
+        items = [pod("a"), {"kind": "Pod", "number": 1234567890, "float": -1.5e10, "text": "a\\\"bé"},
+                 pod("c"), {"kind": "Pod", "last": 42}]
+        text = json.dumps([{"kind": "List", "items": items[:2]}, {"kind": "List", "items": items[2:]}], indent=2)
+        # Every split position of the tokens, including in the middle of numbers and escapes.
+        for chunk_size in range(1, 40):
+            self.assertEqual(self.read(text, chunk_size), items, f"chunk_size={chunk_size}")
+
+    def test_number_at_end_of_chunk(self):
+        text = '{"items": [12345]}'
+        for chunk_size in range(1, len(text) + 1):
+            self.assertEqual(self.read(text, chunk_size), [12345])
+
+    def test_invalid_json(self):
+        with self.assertRaises(ValueError):
+            self.read('{"items": [{"kind": "Pod"} {"kind": "Pod"}]}', 4)
+        with self.assertRaises(ValueError):
+            self.read('{"items": [{"kind": "Pod"', 4)
+
+
+class TestYamlItemReader(unittest.TestCase):
+
+    def read(self, text):
+        return list(iter_yaml_items(io.StringIO(text)))
+
+    def test_single_list(self):
+        text = yaml.safe_dump({"kind": "List", "items": [pod("a"), pod("b")]})
+        self.assertEqual(self.read(text), [pod("a"), pod("b")])
+
+    def test_multiple_documents(self):
+        text = yaml.safe_dump_all([{"kind": "RoleList", "items": [{"kind": "Role", "metadata": {"name": "r"}}]},
+                                   {"kind": "PodList", "items": [pod("a"), pod("b")]},
+                                   {"kind": "SecretList", "items": []},
+                                   None,
+                                   ["not", "a", "list"],
+                                   {"kind": "ConfigMap", "data": {"items": "x"}}])
+        self.assertEqual(self.read(text), get_yaml_items(text))
+        self.assertEqual(len(self.read(text)), 3)
+
+    def test_keys_around_items(self):
+        text = """
+kind: List
+metadata:
+  items: [ignored]
+items:
+- kind: Pod
+  metadata: {name: a}
+extra:
+  items:
+  - kind: Pod
+"""
+        self.assertEqual(self.read(text), [{"kind": "Pod", "metadata": {"name": "a"}}])
+
+    def test_alias_to_earlier_item(self):
+        text = """
+kind: List
+metadata:
+  labels: &labels {app: web}
+items:
+- kind: Pod
+  metadata: {name: a, labels: *labels}
+  spec: &spec
+    containers:
+    - {name: c, image: busybox}
+- kind: Pod
+  metadata: {name: b, labels: *labels}
+  spec: *spec
+"""
+        items = self.read(text)
+        self.assertEqual(items, get_yaml_items(text))
+        self.assertEqual(items[1]["spec"]["containers"][0]["image"], "busybox")
+        self.assertEqual(items[1]["metadata"]["labels"], {"app": "web"})
+
+    def test_anchors_are_scoped_to_their_document(self):
+        text = """
+items:
+- &pod {kind: Pod}
+---
+items:
+- *pod
+"""
+        with self.assertRaises(yaml.YAMLError):
+            self.read(text)
+
+
+if __name__ == '__main__':
+    unittest.main()
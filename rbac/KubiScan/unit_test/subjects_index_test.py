@@ -0,0 +1,100 @@
+import os
+import random
+import tempfile
+import unittest
+
+from kubernetes.client import V1ObjectMeta, V1RoleBinding, V1RoleRef, V1Subject
+
+from engine.utils import SubjectsIndex, search_subject_in_subjects_by_kind
+from KubiScan import read_subjects_file
+from misc.constants import SERVICEACCOUNT_KIND
+
+KINDS = ['User', 'Group', SERVICEACCOUNT_KIND]
+NAMES = ['alice', 'Alice', 'bob', 'system:masters', 'default', 'deployer']
+NAMESPACES = [None, 'default', 'Kube-System', 'kube-system']
+
+
+def make_binding(name, subjects, namespace=None):
+    return V1RoleBinding(metadata=V1ObjectMeta(name=name, namespace=namespace), subjects=subjects,
+                         role_ref=V1RoleRef(api_group='rbac.authorization.k8s.io', kind='ClusterRole', name='view'))
+
+
+def find_bindings(bindings, subject_name, kind, namespace):
+    """The linear search replaced by SubjectsIndex, name and kind matched case-insensitively."""
+    found = []
+    for binding in bindings:
+        for subject in binding.subjects or []:
+            if subject.name.lower() == subject_name.lower() and subject.kind.lower() == kind.lower():
+                if kind == SERVICEACCOUNT_KIND:
+                    subject_namespace = subject.namespace.lower() if subject.namespace is not None else None
+                    if subject_namespace == (namespace.lower() if namespace is not None else None):
+                        found.append(binding)
+                else:
+                    found.append(binding)
+    return found
+
+
+class TestSubjectsIndex(unittest.TestCase):
+
+    def setUp(self):
+        generator = random.Random(0)
+
+        def random_subjects():
+            if generator.random() < 0.1:
+                return None
+            return [V1Subject(kind=generator.choice(KINDS), name=generator.choice(NAMES), namespace=generator.choice(NAMESPACES))
+                    for _ in range(generator.randint(0, 4))]
+
+        self.rolebindings = [make_binding(f"rb-{number}", random_subjects(), 'default') for number in range(200)]
+        self.cluster_rolebindings = [make_binding(f"crb-{number}", random_subjects()) for number in range(200)]
+        self.index = SubjectsIndex(self.rolebindings, self.cluster_rolebindings)
+
+    def test_get_bindings(self):
+        for kind in KINDS + ['user', 'GROUP']:
+            for name in NAMES + ['ALICE', 'nobody']:
+                for namespace in NAMESPACES + ['KUBE-SYSTEM']:
+                    rolebindings, cluster_rolebindings = self.index.get_bindings(name, kind, namespace)
+                    self.assertEqual(rolebindings, find_bindings(self.rolebindings, name, kind, namespace))
+                    self.assertEqual(cluster_rolebindings, find_bindings(self.cluster_rolebindings, name, kind, namespace))
+
+    def test_mixed_case_cluster_rolebinding_subject(self):
+        binding = make_binding('admins', [V1Subject(kind='Group', name='Cluster-Admins')])
+        index = SubjectsIndex([], [binding])
+        self.assertEqual(index.get_bindings('cluster-admins', 'group', None), ([], [binding]))
+
+    def test_get_subjects(self):
+        all_subjects = [subject for binding in self.rolebindings + self.cluster_rolebindings for subject in binding.subjects or []]
+        for kind in KINDS + ['serviceaccount', 'Unknown']:
+            self.assertEqual(self.index.get_subjects(kind), search_subject_in_subjects_by_kind(all_subjects, kind))
+
+
+class TestReadSubjectsFile(unittest.TestCase):
+
+    def read(self, text):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'subjects.txt')
+            with open(path, 'w') as file:
+                file.write(text)
+            return read_subjects_file(path)
+
+    def test_subjects(self):
+        text = ("# kind,name[,namespace]\n"
+                "User,alice\n"
+                "\n"
+                "  Group , system:masters  \n"
+                "ServiceAccount,default,kube-system\n"
+                "ServiceAccount,deployer,\n")
+        self.assertEqual(self.read(text), [('alice', 'User', None),
+                                           ('system:masters', 'Group', None),
+                                           ('default', 'ServiceAccount', 'kube-system'),
+                                           ('deployer', 'ServiceAccount', None)])
+
+    def test_invalid_lines_are_skipped(self):
+        self.assertEqual(self.read("User\n,alice\nUser,\nUser,bob\n"), [('bob', 'User', None)])
+
+    def test_empty_file(self):
+        self.assertEqual(self.read(""), [])
+
+
+if __name__ == '__main__':
+    unittest.main()